@@ -0,0 +1,230 @@
+"""Authoritative rules for several snakes sharing one board, for the server."""
+import random
+from collections import deque
+
+from engine import DIRECTIONS, Occupancy
+from powerups import POWER_UPS, EffectWheel
+
+# Ticks a power-up stays on the board, as in SnakeEngine
+POWER_UP_TICKS = 100
+
+# Only used to pick seeds for arenas started without one
+_seed_source = random.SystemRandom()
+
+
+class Player:
+    """One snake in the arena; `body` is None while it is dead"""
+
+    __slots__ = ('id', 'body', 'direction', 'moved', 'score')
+
+    def __init__(self, player_id):
+        self.id = player_id
+        self.body = None
+        self.direction = DIRECTIONS[1]
+        self.moved = self.direction  # direction of the last move
+        self.score = 0
+
+
+class Arena:
+    """The move_snake rules for many snakes at once.
+
+    Every live snake moves on every tick, all at the same time. A snake
+    dies on walls, on any body (its own or another's) and when two heads
+    meet, unless it is invincible, in which case it passes through bodies
+    and wraps around the edges. There is one food and at most one power-up
+    on the board, spawned and scored as in SnakeEngine, on an Occupancy
+    board shared by all the snakes. Effects that change
+    the tick length (speed boost) keep only their scoring here, since the
+    server ticks everyone at one rate.
+
+    `step` returns the tick's changes as events, which are all a client
+    needs to keep its copy of the board current:
+
+        ('move', id, code)     head moved by DIRECTIONS[code], tail removed
+        ('grow', id, code)     head moved by DIRECTIONS[code], tail kept
+        ('eat', id, points)
+        ('take', id, type)     power-up picked up
+        ('food', cell)         new food position, None if the board is full
+        ('power_up', p)        new (x, y, type) power-up, or None once gone
+        ('spawn', id, cell)    a snake (re)starts as a single cell
+        ('death', id)          a snake died or left; its cells are free
+
+    Joins, leaves and respawns happen between ticks; their events are sent
+    with the next tick's.
+    """
+
+    def __init__(self, cols=60, rows=60, seed=None):
+        self.cols = cols
+        self.rows = rows
+        self.seed = _seed_source.getrandbits(63) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.tick = 0
+        self.players = {}
+        self._next_id = 0
+        self._pending = []  # events from between ticks
+
+        self.board = Occupancy(cols, rows)
+        self.food = self.board.random_free(self.rng)
+        self.power_up = None
+        self.power_up_timer = 0
+        self.effects = EffectWheel()  # keyed by (player id, power-up name)
+
+    def is_occupied(self, cell):
+        return self.board.is_occupied(cell)
+
+    def _spawn_power_up(self, events):
+        if self.rng.random() < 0.3:  # 30% chance
+            cell = self.board.random_free(self.rng, exclude=self.food)
+            if cell is None:
+                return
+            self.power_up = (cell[0], cell[1], POWER_UPS.choose(self.rng))
+            self.power_up_timer = POWER_UP_TICKS
+            events.append(('power_up', self.power_up))
+
+    # -- players -------------------------------------------------------------------------
+
+    def join(self):
+        """Add a snake and return its id"""
+        player = Player(self._next_id)
+        self._next_id += 1
+        self.players[player.id] = player
+        self.respawn(player.id)
+        return player.id
+
+    def leave(self, player_id):
+        player = self.players.pop(player_id)
+        if player.body is not None:
+            self._kill(player, self._pending)
+
+    def respawn(self, player_id):
+        """Restart a dead snake as one cell at a random free spot"""
+        player = self.players[player_id]
+        if player.body is not None:
+            return
+        cell = self.board.random_free(self.rng, exclude=self.food)
+        if cell is None:
+            return  # no room; the client can ask again
+        # Head for the far side of the board, away from the nearest wall
+        player.direction = DIRECTIONS[1] if cell[0] < self.cols // 2 else DIRECTIONS[3]
+        player.moved = player.direction
+        player.body = deque([cell])
+        player.score = 0
+        self.board.occupy(cell)
+        self._pending.append(('spawn', player_id, cell))
+
+    def turn(self, player_id, direction):
+        """Change direction unless it reverses the last move"""
+        player = self.players.get(player_id)
+        if player is None:
+            return
+        dx, dy = player.moved
+        if direction != (-dx, -dy):
+            player.direction = direction
+
+    def _kill(self, player, events):
+        for cell in player.body:
+            self.board.vacate(cell)
+        for power_up in POWER_UPS:
+            self.effects.cancel((player.id, power_up.name))
+        player.body = None
+        events.append(('death', player.id))
+
+    # -- the tick ------------------------------------------------------------------------
+
+    def step(self):
+        """Move every live snake one cell and return the tick's events"""
+        events, self._pending = self._pending, []
+        self.tick += 1
+        cols, rows = self.cols, self.rows
+        live = [p for p in self.players.values() if p.body is not None]
+
+        # Running effects, as they stand before anything is picked up
+        invulnerable = set()
+        multiplier = {}
+        for player_id, name in self.effects.expires:
+            power_up = POWER_UPS[name]
+            if power_up.invulnerable:
+                invulnerable.add(player_id)
+            multiplier[player_id] = multiplier.get(player_id, 1) * power_up.score_multiplier
+
+        # Pick every new head against the board as it was before the tick
+        heads = {}
+        dead = []
+        for player in live:
+            player.moved = player.direction
+            head_x, head_y = player.body[0]
+            dx, dy = player.direction
+            new_head = (head_x + dx, head_y + dy)
+            if player.id not in invulnerable:
+                if not (0 <= new_head[0] < cols and 0 <= new_head[1] < rows):
+                    dead.append(player)
+                    continue
+                if self.is_occupied(new_head):
+                    dead.append(player)
+                    continue
+            else:
+                new_head = (new_head[0] % cols, new_head[1] % rows)
+            heads[player.id] = new_head
+
+        # Heads that meet kill each other, unless invincible
+        claimed = {}
+        for head in heads.values():
+            claimed[head] = claimed.get(head, 0) + 1
+        for player in live:
+            head = heads.get(player.id)
+            if head is not None and claimed[head] > 1 and player.id not in invulnerable:
+                del heads[player.id]
+                dead.append(player)
+
+        for player in dead:
+            self._kill(player, events)
+
+        # Put every new head on the board before anything is eaten, so food
+        # and power-ups spawned this tick cannot land under a later snake
+        moved = [player for player in live if player.id in heads]
+        for player in moved:
+            new_head = heads[player.id]
+            player.body.appendleft(new_head)
+            self.board.occupy(new_head)
+
+        for player in moved:
+            new_head = player.body[0]
+            code = DIRECTIONS.index(player.moved)
+            if new_head == self.food:
+                points = 10 * multiplier.get(player.id, 1)
+                player.score += points
+                events.append(('grow', player.id, code))
+                events.append(('eat', player.id, points))
+                self.food = self.board.random_free(self.rng)
+                events.append(('food', self.food))
+                if self.food is not None:
+                    self._spawn_power_up(events)
+            else:
+                self.board.vacate(player.body.pop())
+                events.append(('move', player.id, code))
+
+            if self.power_up and new_head == self.power_up[:2]:
+                power_type = self.power_up[2]
+                power_up = POWER_UPS[power_type]
+                player.score += power_up.points
+                if power_up.duration:
+                    self.effects.start((player.id, power_type), power_up, self.tick)
+                events.append(('take', player.id, power_type))
+                self.power_up = None
+                events.append(('power_up', None))
+
+        if self.food is None:
+            # The board was full; try again now that snakes have moved
+            self.food = self.board.random_free(self.rng)
+            if self.food is not None:
+                events.append(('food', self.food))
+
+        if self.power_up:
+            self.power_up_timer -= 1
+            if self.power_up_timer <= 0:
+                self.power_up = None
+                events.append(('power_up', None))
+
+        if self.effects:
+            self.effects.advance(self.tick)
+        return events
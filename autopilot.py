@@ -0,0 +1,396 @@
+"""Self-playing controller for the attract-mode demo. Run `python autopilot.py`
+to play games headless and report how the solver does."""
+from array import array
+from collections import deque
+
+from engine import DIRECTIONS, SnakeEngine
+
+
+def hamiltonian_cycle(cols, rows):
+    """Cells of a cycle through every cell of the board, or None if there is none.
+
+    Goes along the top row, serpentines back over the other columns and
+    returns up the left edge, so it needs an even number of rows; boards
+    with only an even number of columns use the transposed cycle.
+    """
+    if cols < 2 or rows < 2:
+        return None
+    if rows % 2 == 0:
+        cells = [(x, 0) for x in range(cols)]
+        for y in range(1, rows):
+            xs = range(cols - 1, 0, -1) if y % 2 else range(1, cols)
+            cells.extend((x, y) for x in xs)
+        cells.extend((0, y) for y in range(rows - 1, 0, -1))
+        return cells
+    if cols % 2 == 0:
+        return [(x, y) for y, x in hamiltonian_cycle(rows, cols)]
+    return None
+
+
+class Autopilot:
+    """Chooses a direction for every tick of a SnakeEngine.
+
+    Moves are planned against a Hamiltonian cycle of the board. While the
+    body lies in cycle order (cycle positions growing from tail to head),
+    every cell ahead of the head up to the tail is free, so the tail stays
+    reachable and following the cycle can never collide. Shortcuts toward
+    the food are taken only when they keep that order, with room to grow:
+
+    - a short snake takes the BFS shortest path to the food through cells
+      ahead of it on the cycle, planned once and replayed from a cache
+      until the food moves or the next cell is blocked;
+    - a long snake picks the neighbour that skips furthest toward the food,
+      a few comparisons per tick however long it is.
+
+    A body that is not in cycle order (the autopilot took over a game in
+    progress, or the board has no cycle) gets the plain BFS path to the food
+    with a tail-reachability check, or else follows its tail.
+
+    Boards with both sides odd have no Hamiltonian cycle: colour the board
+    like a chessboard and there is one cell more of one colour, while a
+    cycle alternates. There the BFS alone plays every game, and a good part
+    of them end in a death or in circling until a timeout (35 deaths in 100
+    games on 9x9). `snake.py --demo` refuses such boards.
+    """
+
+    def __init__(self, engine, long_snake=0.25):
+        self.engine = engine
+        cols, rows = engine.cols, engine.rows
+        self.cols = cols
+        self.cells = cols * rows
+        self.long_snake = max(2, int(self.cells * long_snake))
+
+        # neighbours[cell] = ((cell, direction), ...) for every move that stays on the board
+        self._neighbours = []
+        for index in range(self.cells):
+            x, y = index % cols, index // cols
+            self._neighbours.append(tuple(
+                ((y + dy) * cols + x + dx, (dx, dy)) for dx, dy in DIRECTIONS
+                if 0 <= x + dx < cols and 0 <= y + dy < rows))
+
+        cycle = hamiltonian_cycle(cols, rows)
+        self._order = None  # cell -> position on the cycle
+        if cycle is not None:
+            self._order = array('i', bytes(4 * self.cells))
+            for position, (x, y) in enumerate(cycle):
+                self._order[y * cols + x] = position
+
+        self.reset()
+
+    def reset(self):
+        """Forget cached plans, e.g. after the engine starts a new game"""
+        self._path = deque()  # cells still to visit on the cached path
+        self._target = None  # food the cached path leads to
+        self._ordered = False  # body known to lie in cycle order
+        self._behind = None  # cell a one-cell snake may not move back into
+
+    def _index(self, cell):
+        return cell[1] * self.cols + cell[0]
+
+    def choose(self):
+        """Direction for the next tick; pass it to engine.turn"""
+        engine = self.engine
+        head = self._index(engine.snake[0])
+        occupied = engine.occupancy
+        # engine.turn refuses to reverse, even for a snake with no neck
+        x, y = engine.snake[0][0] - engine.direction[0], engine.snake[0][1] - engine.direction[1]
+        self._behind = None
+        if len(engine.snake) == 1 and 0 <= x < engine.cols and 0 <= y < engine.rows:
+            self._behind = self._index((x, y))
+        if self._order is not None:
+            if not self._ordered and self._is_ordered():
+                # Plans made for an unordered body may not keep the order
+                self._ordered = True
+                self._path.clear()
+            if self._ordered:
+                return self._cycle_step(head)
+            if self._follow_is_safe():
+                # Following the cycle puts the body in order within a length
+                return self._step(head, self._next_on_cycle(head))
+        return self._plan_step(head, occupied)
+
+    # -- ordered body: Hamiltonian cycle with shortcuts ---------------------------------
+
+    def _is_ordered(self):
+        """True if the cycle positions grow from the tail to the head"""
+        order, n = self._order, self.cells
+        snake = self.engine.snake
+        base = order[self._index(snake[-1])]
+        previous = -1
+        for cell in reversed(snake):
+            distance = (order[self._index(cell)] - base) % n
+            if distance <= previous:
+                return False
+            previous = distance
+        return True
+
+    def _follow_is_safe(self):
+        """True if the head can follow the cycle without reaching the body.
+
+        The head reaches a segment's cell after (cycle distance) ticks; the
+        segment j places from the tail is gone after j + 1 ticks, provided
+        nothing is eaten on the way. Eating is caught by checking every tick.
+        """
+        order, n = self._order, self.cells
+        snake = self.engine.snake
+        head = order[self._index(snake[0])]
+        for j, cell in enumerate(reversed(snake)):
+            if j == len(snake) - 1:
+                break  # the head itself
+            if (order[self._index(cell)] - head) % n < j + 2:
+                return False
+        return True
+
+    def _next_on_cycle(self, cell):
+        following = (self._order[cell] + 1) % self.cells
+        for neighbour, _ in self._neighbours[cell]:
+            if self._order[neighbour] == following:
+                return neighbour
+
+    def _cycle_step(self, head):
+        order, n = self._order, self.cells
+        engine = self.engine
+        snake = engine.snake
+        position = order[head]
+
+        # Cells strictly between the head and the tail on the cycle are free.
+        # Shortcuts may go at most `limit` positions ahead: never past the
+        # food, and far enough from the tail to leave room for growth. The
+        # cells a shortcut skips stay free behind the head until the tail
+        # passes them, so shortcuts stop once half the board is covered,
+        # leaving time for those gaps to close before the board fills.
+        to_tail = (order[self._index(snake[-1])] - position) % n if len(snake) > 1 else n
+        to_food = (order[self._index(engine.food)] - position) % n if engine.food else 1
+        limit = min(to_food, to_tail - 4) if 2 * len(snake) < n else 1
+
+        if len(snake) < self.long_snake and engine.food is not None:
+            food = self._index(engine.food)
+            if self._path and self._target == food:
+                direction = self._step(head, self._path[0])
+                if direction is not None:
+                    self._path.popleft()
+                    return direction
+            path = self._cycle_path(head, food, limit)
+            if path:
+                self._path = deque(path)
+                self._target = food
+                return self._step(head, self._path.popleft())
+
+        self._path.clear()
+        best, best_distance = self._next_on_cycle(head), 1
+        if best == self._behind:
+            # A one-cell snake is in order wherever it goes, but may not reverse
+            best, best_distance = next(cell for cell, _ in self._neighbours[head]
+                                       if cell != self._behind), 0
+        for cell, _ in self._neighbours[head]:
+            distance = (order[cell] - position) % n
+            if best_distance < distance <= limit and cell != self._behind:
+                best, best_distance = cell, distance
+        return self._step(head, best)
+
+    def _cycle_path(self, start, goal, limit):
+        """Shortest path to `goal` on which every step moves ahead on the cycle,
+        by at most `limit` positions from `start` in total; None if there is none"""
+        order, n = self._order, self.cells
+        base = order[start]
+        if (order[goal] - base) % n > limit:
+            return None
+        parent = {start: None}
+        queue = deque([start])
+        neighbours = self._neighbours
+        while queue:
+            cell = queue.popleft()
+            ahead = (order[cell] - base) % n
+            for neighbour, _ in neighbours[cell]:
+                if neighbour in parent or not ahead < (order[neighbour] - base) % n <= limit:
+                    continue
+                if neighbour == self._behind:
+                    continue
+                parent[neighbour] = cell
+                if neighbour == goal:
+                    path = []
+                    while neighbour != start:
+                        path.append(neighbour)
+                        neighbour = parent[neighbour]
+                    path.reverse()
+                    return path
+                queue.append(neighbour)
+        return None
+
+    # -- unordered body: BFS with a tail check ------------------------------------------
+
+    def _plan_step(self, head, occupied):
+        engine = self.engine
+        food = engine.food
+        food = self._index(food) if food is not None else None
+
+        if self._path and self._target == food:
+            cell = self._path[0]
+            for neighbour, direction in self._neighbours[head]:
+                if neighbour == cell and not occupied[cell]:
+                    self._path.popleft()
+                    return direction
+        self._path.clear()
+
+        if food is not None:
+            path = self._shortest_path(head, food, occupied)
+            if path and self._safe_after(path, grow=True):
+                self._path = deque(path)
+                self._target = food
+                return self._step(head, self._path.popleft())
+        return self._survive(head, occupied, food)
+
+    def _step(self, head, cell):
+        for neighbour, direction in self._neighbours[head]:
+            if neighbour == cell:
+                return direction
+
+    def _shortest_path(self, start, goal, occupied):
+        """Free cells from `start` (exclusive) to `goal`, or None"""
+        parent = {start: None}
+        queue = deque([start])
+        neighbours = self._neighbours
+        while queue:
+            cell = queue.popleft()
+            for neighbour, _ in neighbours[cell]:
+                if neighbour not in parent and not occupied[neighbour] and neighbour != self._behind:
+                    parent[neighbour] = cell
+                    if neighbour == goal:
+                        path = []
+                        while neighbour != start:
+                            path.append(neighbour)
+                            neighbour = parent[neighbour]
+                        path.reverse()
+                        return path
+                    queue.append(neighbour)
+        return None
+
+    def _safe_after(self, path, grow):
+        """True if, after walking `path`, the head can still get to the tail.
+
+        The body is moved along the path on a scratch grid. The tail counts as
+        reachable only through at least one other cell, since the rules kill a
+        snake that moves straight into its current tail.
+        """
+        snake = self.engine.snake
+        length = len(snake) + (1 if grow else 0)
+        body = [*reversed(path), *(self._index(cell) for cell in snake)][:length]
+        if len(body) < 2:
+            return True
+        occupied = bytearray(self.cells)
+        for cell in body:
+            occupied[cell] = 1
+        tail = body[-1]
+        occupied[tail] = 0
+
+        seen = {body[0], tail}
+        queue = deque(cell for cell, _ in self._neighbours[body[0]]
+                      if not occupied[cell] and cell != tail)
+        seen.update(queue)
+        neighbours = self._neighbours
+        while queue:
+            cell = queue.popleft()
+            for neighbour, _ in neighbours[cell]:
+                if neighbour == tail:
+                    return True
+                if neighbour not in seen and not occupied[neighbour]:
+                    seen.add(neighbour)
+                    queue.append(neighbour)
+        return False
+
+    def _space(self, start, occupied):
+        """Number of free cells reachable from `start`"""
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            for neighbour, _ in self._neighbours[cell]:
+                if neighbour not in seen and not occupied[neighbour]:
+                    seen.add(neighbour)
+                    queue.append(neighbour)
+        return len(seen)
+
+    def _survive(self, head, occupied, food):
+        """No safe way to the food: follow the tail, or failing that find room"""
+        reverse = tuple(-d for d in self.engine.direction)
+        moves = [(cell, direction) for cell, direction in self._neighbours[head]
+                 if not occupied[cell] and direction != reverse]
+        if not moves:
+            return self.engine.direction
+
+        # Prefer safe moves away from the food, which buys time for the
+        # tail to open a way to it
+        cols = self.cols
+        safe = [(cell, direction) for cell, direction in moves
+                if self._safe_after([cell], grow=cell == food)]
+        if safe:
+            if food is None:
+                return safe[0][1]
+            fx, fy = food % cols, food // cols
+            return max(safe, key=lambda move: abs(move[0] % cols - fx)
+                       + abs(move[0] // cols - fy))[1]
+        return max(moves, key=lambda move: self._space(move[0], occupied))[1]
+
+
+def play(cols=30, rows=30, seed=0, max_ticks=None):
+    """Play one game with the autopilot; returns (engine, ticks spent planning in ns)"""
+    import time
+
+    engine = SnakeEngine(cols, rows, seed=seed)
+    pilot = Autopilot(engine)
+    if max_ticks is None:
+        max_ticks = 400 * cols * rows
+    clock = time.perf_counter_ns
+    planning = array('q')
+    while not engine.game_over and engine.tick < max_ticks:
+        start = clock()
+        direction = pilot.choose()
+        planning.append(clock() - start)
+        engine.turn(direction)
+        engine.step()
+    return engine, planning
+
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the autopilot over many headless games. Boards with both "
+                    "sides odd have no Hamiltonian cycle and expect deaths and timeouts.")
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--cols', type=int, default=10)
+    parser.add_argument('--rows', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game")
+    args = parser.parse_args()
+
+    wins = deaths = timeouts = ticks = 0
+    lengths = 0
+    planning = array('q')
+    start = time.perf_counter()
+    for game in range(args.games):
+        engine, times = play(args.cols, args.rows, seed=args.seed + game)
+        planning.extend(times)
+        ticks += engine.tick
+        lengths += len(engine.snake)
+        if engine.won:
+            wins += 1
+        elif engine.game_over:
+            deaths += 1
+            print(f"seed {args.seed + game}: died at length {len(engine.snake)}")
+        else:
+            timeouts += 1
+    elapsed = time.perf_counter() - start
+
+    planning = sorted(planning)
+    print(f"{args.games} games on {args.cols}x{args.rows}: {wins} won, {deaths} died, "
+          f"{timeouts} timed out, mean final length {lengths / args.games:.1f}")
+    print(f"{ticks:,} ticks in {elapsed:.1f} s; planning per tick: "
+          f"mean {sum(planning) / len(planning) / 1000:.1f} us, "
+          f"p99 {planning[int(len(planning) * 0.99)] / 1000:.1f} us, "
+          f"max {planning[-1] / 1000:.1f} us")
+    raise SystemExit(1 if deaths else 0)
+
+
+if __name__ == "__main__":
+    main()
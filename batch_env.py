@@ -0,0 +1,212 @@
+import numpy as np
+
+from engine import DIRECTIONS
+from powerups import POWER_UPS
+
+# Per-direction offsets, indexed by the codes in engine.DIRECTIONS
+DX = np.array([d[0] for d in DIRECTIONS], dtype=np.int32)
+DY = np.array([d[1] for d in DIRECTIONS], dtype=np.int32)
+RIGHT_CODE = DIRECTIONS.index((1, 0))
+
+
+class BatchSnakeEnv:
+    """N independent snake games stepped together with vectorized NumPy ops.
+
+    Implements the same rules as SnakeEngine.step. Each game keeps a per-cell
+    occupancy count and its body as a ring buffer of cell indices (head at
+    `head_ptr`, `length` cells back to the tail). Finished games are reset
+    automatically at the end of the step that ended them.
+
+    Actions are direction codes (indexes into engine.DIRECTIONS), or -1 to
+    keep going straight; reversing onto the body is ignored, as in
+    SnakeEngine.turn.
+    """
+
+    def __init__(self, num_envs, cols=30, rows=30, seed=None):
+        self.num_envs = num_envs
+        self.cols = cols
+        self.rows = rows
+        self.cells = cols * rows
+        self.rng = np.random.default_rng(seed)
+
+        n, c = num_envs, self.cells
+        self.occupied = np.zeros((n, c), dtype=np.uint8)
+        self.body = np.zeros((n, c), dtype=np.int32)
+        self.head_ptr = np.zeros(n, dtype=np.int32)
+        self.length = np.zeros(n, dtype=np.int32)
+        self.direction = np.zeros(n, dtype=np.int8)
+        self.food = np.zeros(n, dtype=np.int32)
+        self.power_up = np.full(n, -1, dtype=np.int32)  # cell, -1 if none
+        self.power_up_type = np.zeros(n, dtype=np.int8)
+        self.power_up_timer = np.zeros(n, dtype=np.int32)
+        self.effects = np.zeros((n, len(POWER_UPS)), dtype=np.int32)  # ticks left per type
+        self.score = np.zeros(n, dtype=np.int64)
+
+        # Final scores and win flags of the games that ended on the last step
+        self.final_score = np.zeros(n, dtype=np.int64)
+        self.won = np.zeros(n, dtype=bool)
+
+        # The power-up registry as arrays indexed by type
+        types = POWER_UPS.types
+        self._duration = np.array([p.duration for p in types], dtype=np.int32)
+        self._points = np.array([p.points for p in types], dtype=np.int64)
+        self._multiplier = np.array([p.score_multiplier for p in types], dtype=np.int64)
+        self._invulnerable = np.array([p.invulnerable for p in types], dtype=bool)
+        self._stacks = np.array([p.stacks for p in types], dtype=bool)
+        self._probability = np.array(POWER_UPS.probability)
+        self._alias = np.array(POWER_UPS.alias, dtype=np.int8)
+
+        self._rows = np.arange(n)
+        self.reset()
+
+    def reset(self, envs=None):
+        """Start new games in the given envs (all of them by default)"""
+        if envs is None:
+            envs = self._rows
+        if len(envs) == 0:
+            return
+
+        start = (self.rows // 2) * self.cols + self.cols // 2  # Start in center
+        self.occupied[envs] = 0
+        self.occupied[envs, start] = 1
+        self.head_ptr[envs] = 0
+        self.body[envs, 0] = start
+        self.length[envs] = 1
+        self.direction[envs] = RIGHT_CODE
+        self.score[envs] = 0
+        self.power_up[envs] = -1
+        self.power_up_timer[envs] = 0
+        self.effects[envs] = 0
+        self.food[envs] = self._sample_free(envs)
+
+    def heads(self):
+        """Head cell index of every game"""
+        return self.body[self._rows, self.head_ptr]
+
+    def _sample_free(self, envs, exclude=None, attempts=8):
+        """Uniformly pick a free cell per env (-1 if none), skipping `exclude` cells"""
+        picked = np.full(len(envs), -1, dtype=np.int32)
+        pending = np.arange(len(envs))
+
+        # Rejection sampling is cheap while the boards are mostly empty
+        for _ in range(attempts):
+            if len(pending) == 0:
+                return picked
+            cand = self.rng.integers(0, self.cells, size=len(pending), dtype=np.int32)
+            ok = self.occupied[envs[pending], cand] == 0
+            if exclude is not None:
+                ok &= cand != exclude[pending]
+            picked[pending[ok]] = cand[ok]
+            pending = pending[~ok]
+
+        if len(pending):
+            # Crowded boards: the argmax of uniform keys over free cells is a
+            # uniform choice among them
+            keys = self.rng.random((len(pending), self.cells))
+            keys[self.occupied[envs[pending]] > 0] = -1.0
+            if exclude is not None:
+                keys[np.arange(len(pending)), exclude[pending]] = -1.0
+            best = keys.argmax(axis=1)
+            has_free = keys[np.arange(len(pending)), best] >= 0
+            picked[pending[has_free]] = best[has_free]
+        return picked
+
+    def step(self, actions):
+        """Advance every game one tick.
+
+        Returns (rewards, dones): the score gained this tick and whether the
+        game ended (and was reset). `final_score` and `won` describe the
+        games that ended.
+        """
+        actions = np.asarray(actions)
+        rows = self._rows
+
+        # Turn unless it would reverse the snake onto itself
+        turn = (actions >= 0) & (actions != (self.direction + 2) % 4)
+        self.direction = np.where(turn, actions, self.direction).astype(np.int8)
+
+        # Get new head position
+        head = self.body[rows, self.head_ptr]
+        nx = head % self.cols + DX[self.direction]
+        ny = head // self.cols + DY[self.direction]
+
+        # Wall collision unless invincible, wrap around when invincible
+        invincible = (self.effects[:, self._invulnerable] > 0).any(axis=1)
+        off_board = (nx < 0) | (nx >= self.cols) | (ny < 0) | (ny >= self.rows)
+        new_head = (ny % self.rows) * self.cols + nx % self.cols
+
+        # Self collision unless invincible
+        dead = ~invincible & (off_board | (self.occupied[rows, new_head] > 0))
+        alive = np.flatnonzero(~dead)
+        cell = new_head[alive]
+
+        score_before = self.score.copy()
+
+        # Add new head
+        ptr = (self.head_ptr[alive] + 1) % self.cells
+        self.head_ptr[alive] = ptr
+        self.body[alive, ptr] = cell
+        self.occupied[alive, cell] += 1
+
+        # Food
+        ate_mask = cell == self.food[alive]
+        ate = alive[ate_mask]
+        multiplier = np.where(self.effects[ate] > 0, self._multiplier, 1).prod(axis=1)
+        self.score[ate] += 10 * multiplier  # e.g. double points during speed boost
+        self.length[ate] += 1
+
+        # Remove tail if no food eaten
+        grew_not = alive[~ate_mask]
+        tail = self.body[grew_not, (self.head_ptr[grew_not] - self.length[grew_not]) % self.cells]
+        self.occupied[grew_not, tail] -= 1
+
+        won = np.zeros(self.num_envs, dtype=bool)
+        if len(ate):
+            food = self._sample_free(ate)
+            full = (food < 0) | (self.length[ate] >= self.cells)
+            won[ate[full]] = True
+            self.food[ate] = np.where(full, self.food[ate], food)
+
+            # Chance to spawn power-up
+            spawning = ate[~full]
+            spawning = spawning[self.rng.random(len(spawning)) < 0.3]
+            if len(spawning):
+                spot = self._sample_free(spawning, exclude=self.food[spawning])
+                placed = spawning[spot >= 0]
+                self.power_up[placed] = spot[spot >= 0]
+                # Alias-table draw; columns that keep their own type need no coin
+                kind = self.rng.integers(0, len(POWER_UPS), size=len(placed))
+                if (self._probability < 1).any():
+                    coin = self.rng.random(len(placed)) >= self._probability[kind]
+                    kind = np.where(coin, self._alias[kind], kind)
+                self.power_up_type[placed] = kind
+                self.power_up_timer[placed] = 100  # Disappears after 100 game ticks
+
+        # Power-up collision
+        got = alive[self.power_up[alive] == cell]
+        kind = self.power_up_type[got]
+        self.score[got] += self._points[kind]  # Bonus points
+        self.power_up[got] = -1
+
+        # Start the effect, or add to it for a stacking type
+        timed = self._duration[kind] > 0
+        got, kind = got[timed], kind[timed]
+        left = self.effects[got, kind]
+        self.effects[got, kind] = np.where(self._stacks[kind] & (left > 0),
+                                           left + self._duration[kind], self._duration[kind])
+
+        # Update power-up timer
+        timed = alive[self.power_up[alive] >= 0]
+        self.power_up_timer[timed] -= 1
+        self.power_up[timed[self.power_up_timer[timed] <= 0]] = -1
+
+        # Update power-up effects
+        self.effects[alive] = np.maximum(self.effects[alive] - 1, 0)
+
+        rewards = self.score - score_before
+        dones = dead | won
+        finished = np.flatnonzero(dones)
+        self.final_score[finished] = self.score[finished]
+        self.won[:] = won
+        self.reset(finished)
+        return rewards, dones
@@ -0,0 +1,538 @@
+"""Performance benchmarks. Run `python benchmarks.py <name>... | all`.
+
+Every benchmark returns {metric: value}. Metric names end in their unit:
+rates ("/s") are better when higher, times ("us", "ns") when lower. Save a
+run with --json and check a later one against it with --compare.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+CELL = 20  # pixels per cell, as in the game
+
+
+def bench_batch(steps=200):
+    """Steps per second of BatchSnakeEnv at growing batch sizes"""
+    import numpy as np
+    from batch_env import BatchSnakeEnv
+
+    results = {}
+    for n in (1, 64, 1024, 16384):
+        env = BatchSnakeEnv(n, seed=0)
+        rng = np.random.default_rng(0)
+        actions = rng.integers(-1, 4, size=(steps, n))
+        env.step(actions[0])  # warm up
+
+        start = time.perf_counter()
+        for i in range(steps):
+            env.step(actions[i])
+        elapsed = time.perf_counter() - start
+
+        rate = results[f"N={n} steps/s"] = n * steps / elapsed
+        print(f"N={n:>6}: {rate:>14,.0f} game steps/s")
+    return results
+
+
+def bench_rollout(games=256):
+    """Game ticks per second of the process pool from one worker up to every core"""
+    from rollout import run_rollouts
+
+    cores = os.cpu_count() or 1
+    counts = sorted({1, cores} | {2 ** k for k in range(1, cores.bit_length()) if 2 ** k < cores})
+    results = {}
+    single = None
+    for workers in counts:
+        start = time.perf_counter()
+        summaries, _ = run_rollouts(games, workers=workers)
+        elapsed = time.perf_counter() - start
+
+        ticks = sum(s[2] for s in summaries)
+        rate = results[f"workers={workers} ticks/s"] = ticks / elapsed
+        single = single or rate
+        print(f"workers={workers:>3}: {rate:>12,.0f} ticks/s  ({rate / single:.2f}x)")
+    return results
+
+
+def _colors_by_formula(frame, length, lines):
+    """Per-frame color work as update_display/animate did it before the palette"""
+    grid_offset = (frame % 20) * 0.1
+    colors = []
+    for i in lines:
+        alpha = abs(math.sin((i + grid_offset) * 0.1)) * 0.3 + 0.1
+        colors.append(f"#{int(22 + alpha * 100):02x}{int(83 + alpha * 50):02x}{int(126 + alpha * 50):02x}")
+    shimmer = abs(math.sin(frame * 0.1)) * 0.3 + 0.7
+    colors.append(f"#00{int(255 * shimmer):02x}{int(136 * shimmer):02x}")
+    for i in range(1, length):
+        intensity = max(0.3, 1 - (i * 0.1))
+        body_shimmer = abs(math.sin(frame * 0.1 + i * 0.3)) * 0.2 + 0.8
+        r = int(0 * intensity * body_shimmer)
+        g = int(255 * intensity * body_shimmer)
+        b = int(136 * intensity * body_shimmer)
+        colors.append(f"#{r:02x}{g:02x}{b:02x}")
+    food_pulse = abs(math.sin(frame * 0.2)) * 0.5 + 0.5
+    colors.append(f"#{int(255 * food_pulse):02x}4444")
+    return colors
+
+
+def _colors_by_palette(palette, frame, length, lines):
+    """The same colors looked up from the precomputed palette"""
+    from palette import INTENSITY_LEVELS, STEPS
+
+    grid = palette.grid[frame % 20]
+    colors = [grid[i] for i in lines]
+    colors.append(palette.head_color(frame, False))
+    table = palette.body
+    base = frame * 0.1 * palette.scale
+    step = 0.3 * palette.scale
+    last_level = INTENSITY_LEVELS - 1
+    for i in range(1, length):
+        level = i if i < last_level else last_level
+        colors.append(table[level][int(base + i * step) % STEPS])
+    colors.append(palette.food(frame)[0])
+    return colors
+
+
+def bench_palette(frames=2000):
+    """Per-frame color computation: trig + f-strings versus palette lookups"""
+    from palette import Palette
+
+    start = time.perf_counter()
+    palette = Palette(600, 600, 20)
+    build = time.perf_counter() - start
+    print(f"palette build: {build * 1000:.2f} ms (once, at startup)")
+
+    lines = list(range(0, 600, 20)) * 2
+    results = {}
+    for length in (1, 100, 899):
+        timings = {}
+        for name, compute in (('formula', _colors_by_formula),
+                              ('palette', lambda f, n, l: _colors_by_palette(palette, f, n, l))):
+            start = time.perf_counter()
+            for frame in range(frames):
+                compute(frame, length, lines)
+            timings[name] = (time.perf_counter() - start) / frames * 1e6
+            results[f"length={length} {name} us"] = timings[name]
+        saved = timings['formula'] - timings['palette']
+        print(f"length={length:>4}: formula {timings['formula']:8.1f} us/frame, "
+              f"palette {timings['palette']:8.1f} us/frame, saves {saved:8.1f} us/frame")
+    return results
+
+
+# -- headless game ---------------------------------------------------------------
+
+class _MockTk:
+    """Tcl interpreter stand-in: accepts every command (image creation included)"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def call(self, *args):
+        self.calls += 1
+        return ''
+
+    def eval(self, script):
+        self.calls += 1
+        return ''
+
+
+class MockCanvas:
+    """tk.Canvas stand-in for machines without a display; counts Tk calls.
+
+    Frame times measured on it cover the Python side of rendering only, which
+    is what changes between commits; Tk's own drawing cost is not included.
+    """
+
+    def __init__(self):
+        self.tk = _MockTk()
+        self._last_item = 0
+
+    def __str__(self):
+        return '.canvas'
+
+    def _create(self, *args, **options):
+        self.tk.calls += 1
+        self._last_item += 1
+        return self._last_item
+
+    create_line = create_rectangle = create_oval = create_text = create_image = _create
+
+    def _command(self, *args, **options):
+        self.tk.calls += 1
+
+    coords = itemconfig = tag_raise = configure = xview_moveto = yview_moveto = _command
+
+
+class _Label:
+    def __init__(self):
+        self._text = ''
+
+    def cget(self, option):
+        return self._text
+
+    def config(self, text):
+        self._text = text
+
+
+def _canvas(width, height):
+    """A real canvas when a display is available, else a MockCanvas"""
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return MockCanvas()
+    canvas = tk.Canvas(root, width=width, height=height)
+    canvas.pack()
+    return canvas
+
+
+def _headless_game(engine, canvas=None):
+    """An AwesomeSnake view over `engine` with no window; status labels are stubs"""
+    from inputs import InputQueue
+    from particles import ParticlePool, TextPool
+    from renderer import CanvasRenderer
+    from rewind import RewindBuffer
+    from snake import AwesomeSnake
+
+    game = AwesomeSnake.__new__(AwesomeSnake)
+    game.engine = engine
+    game.replay = None
+    game.remote = None
+    game.autopilot = None
+    game.demo = False
+    game.scores = None
+    game.power_ups_taken = 0
+    game.rewind = engine.history = RewindBuffer(capacity=100)
+    game.rewinding = game.rewound = False
+    game.inputs = InputQueue()
+    game.game_started = time.time()
+    game.paused = False
+    game.cell_size = CELL
+    game.animation_frame = 0
+    game.particles = ParticlePool(capacity=256)
+    game.texts = TextPool(capacity=32)
+    game.score_label = _Label()
+    game.high_score_label = _Label()
+    game.status_label = _Label()
+    if canvas is not None:
+        game.renderer = CanvasRenderer(canvas, engine.cols * CELL, engine.rows * CELL, CELL)
+    return game
+
+
+def _snake_on_cycle(length, cols=30, rows=30):
+    """An engine whose snake has `length` cells and can follow the cycle forever.
+
+    The snake is grown through the normal rules by putting food in front of
+    it. Food and power-ups are then removed so the length stays fixed.
+    Returns (engine, cycle, turns, position): turns[i] is the direction from
+    cycle[i] to the next cell, position the index of the head.
+    """
+    from autopilot import hamiltonian_cycle
+    from engine import SnakeEngine
+
+    engine = SnakeEngine(cols, rows, seed=0)
+    cycle = hamiltonian_cycle(cols, rows)
+    turns = []
+    for i, (x, y) in enumerate(cycle):
+        nx, ny = cycle[(i + 1) % len(cycle)]
+        turns.append((nx - x, ny - y))
+
+    position = cycle.index(engine.snake[0])
+    while len(engine.snake) < length:
+        engine.food = cycle[(position + 1) % len(cycle)]
+        engine.direction = turns[position]
+        engine.step()
+        position = (position + 1) % len(cycle)
+    engine.food = None
+    engine.power_up = None
+    engine.effects.clear()
+    return engine, cycle, turns, position
+
+
+# -- simulation --------------------------------------------------------------------
+
+def bench_tick(ticks=20000):
+    """move_snake ticks per second at fixed snake lengths on the 30x30 board"""
+    results = {}
+    for length in (1, 100, 500, 899):
+        engine, cycle, turns, position = _snake_on_cycle(length)
+        game = _headless_game(engine)
+        size = len(cycle)
+
+        start = time.perf_counter()
+        for _ in range(ticks):
+            engine.direction = turns[position]
+            game.move_snake()
+            position = (position + 1) % size
+        elapsed = time.perf_counter() - start
+        assert not engine.game_over and len(engine.snake) == length
+
+        rate = results[f"length={length} ticks/s"] = ticks / elapsed
+        print(f"length={length:>4}: {rate:>12,.0f} ticks/s")
+    return results
+
+
+def bench_spawn(calls=100000):
+    """spawn_food latency as the snake fills the board"""
+    results = {}
+    for length in (1, 450, 810, 891, 899):
+        engine = _snake_on_cycle(length)[0]
+        spawn = engine.spawn_food
+
+        start = time.perf_counter()
+        for _ in range(calls):
+            spawn()
+        elapsed = time.perf_counter() - start
+
+        latency = results[f"filled={length / 900:.1%} ns"] = elapsed / calls * 1e9
+        print(f"length={length:>4} ({length / 900:6.1%} full): {latency:8.1f} ns per spawn_food")
+    return results
+
+
+def bench_autopilot(games=200, cols=10, rows=10):
+    """Autopilot planning time per tick and outcomes over many headless games"""
+    from autopilot import play
+
+    wins = 0
+    planning = []
+    start = time.perf_counter()
+    for seed in range(games):
+        engine, times = play(cols, rows, seed=seed)
+        wins += engine.won
+        planning.extend(times)
+    elapsed = time.perf_counter() - start
+
+    planning.sort()
+    results = {
+        "games won/s": wins / elapsed,
+        "planning mean us": sum(planning) / len(planning) / 1000,
+        "planning p99 us": planning[int(len(planning) * 0.99)] / 1000,
+    }
+    print(f"{games} games on {cols}x{rows}: {wins} won in {elapsed:.1f} s; planning "
+          f"mean {results['planning mean us']:.1f} us, p99 {results['planning p99 us']:.1f} us")
+    return results
+
+
+# -- rendering ---------------------------------------------------------------------
+
+def _fill_particles(game):
+    """Fill the particle pool to capacity with particles that outlive the run"""
+    pool = game.particles
+    while len(pool) < pool.capacity:
+        game.add_particle_effect(300, 300, "#ffff00", pool.capacity - len(pool))
+    for i in range(pool.count):
+        pool.life[i] = 1 << 30
+
+
+def bench_frame(frames=3000, lengths=(2, 100, 899)):
+    """update_display frame time at several snake lengths, with and without particles.
+
+    Frame cost should follow what changed on screen, not the snake's length.
+    """
+    from profiler import Profiler
+
+    results = {}
+    for length in lengths:
+        for particles in (False, True):
+            canvas = _canvas(30 * CELL, 30 * CELL)
+            engine, cycle, turns, position = _snake_on_cycle(length)
+            game = _headless_game(engine, canvas)
+            game.renderer.prebuild_grid()
+            if particles:
+                _fill_particles(game)
+
+            profiler = Profiler(capacity=frames)
+            profiler.attach(game, ('update_display',))
+            for frame in range(frames):
+                # About nine frames per tick at 60 fps and the default speed,
+                # and an animation step every third frame (20 per second)
+                if frame % 9 == 0:
+                    engine.direction = turns[position]
+                    game.move_snake()
+                    position = (position + 1) % len(cycle)
+                if frame % 3 == 0:
+                    game.animate()
+                game.update_display(frame % 9 / 9)
+            profiler.detach()
+
+            label = f"length {length}, " + ('particles' if particles else 'no particles')
+            kind = 'mock' if isinstance(canvas, MockCanvas) else 'Tk'
+            p50, p99 = profiler.percentiles('update_display', 50, 99)
+            results[f"{label} p50 us"] = p50 * 1000
+            results[f"{label} p99 us"] = p99 * 1000
+            print(f"{label:>27}: p50 {p50 * 1000:8.1f} us, p99 {p99 * 1000:8.1f} us per frame "
+                  f"({len(game.particles)} particles, {kind} canvas)")
+    return results
+
+
+def bench_particles(frames=2000):
+    """ParticlePool.update cost per animation frame with a full pool"""
+    import random
+    from particles import ParticlePool
+
+    results = {}
+    for capacity in (256, 1024, 4096):
+        pool = ParticlePool(capacity=capacity)
+        rng = random.Random(0)
+        for _ in range(capacity):
+            pool.emit(300, 300, rng.uniform(-3, 3), rng.uniform(-3, 3), frames + 1,
+                      "#ffff00", rng.uniform(2, 4))
+
+        start = time.perf_counter()
+        for _ in range(frames):
+            pool.update()
+        elapsed = time.perf_counter() - start
+
+        cost = results[f"particles={capacity} us"] = elapsed / frames * 1e6
+        print(f"particles={capacity:>5}: {cost:8.1f} us per frame")
+
+    # Churn: short lives, so every frame swap-removes and re-emits
+    pool = ParticlePool(capacity=256)
+    start = time.perf_counter()
+    for frame in range(frames):
+        for _ in range(16):
+            pool.emit(300, 300, rng.uniform(-3, 3), rng.uniform(-3, 3), 20,
+                      "#ff0000", rng.uniform(2, 4))
+        pool.update()
+    elapsed = time.perf_counter() - start
+    cost = results["churn us"] = elapsed / frames * 1e6
+    print(f"churn (16 emits/frame into 256): {cost:8.1f} us per frame")
+    return results
+
+
+def bench_scores(games=2000, keep=1000):
+    """ScoreStore.record latency on the game thread, and loading a full log"""
+    import random
+    import tempfile
+
+    from scores import ScoreStore
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'scores.jsonl')
+        store = ScoreStore(path, keep=keep, batch_interval=0.01)
+        store.open()
+        latencies = []
+        for game in range(games):
+            start = time.perf_counter()
+            store.record(rng.randrange(10000), 50, 2, 500, 60.0, 'body', time.time(), game)
+            latencies.append(time.perf_counter() - start)
+        store.close()
+
+        start = time.perf_counter()
+        store = ScoreStore(path, keep=keep)
+        store.open()
+        load = time.perf_counter() - start
+        store.close()
+
+    latencies.sort()
+    results = {
+        'record p50 us': latencies[len(latencies) // 2] * 1e6,
+        'record p99 us': latencies[int(len(latencies) * 0.99)] * 1e6,
+        'open ms': load * 1000,
+    }
+    print(f"record: p50 {results['record p50 us']:6.1f} us, p99 {results['record p99 us']:6.1f} us "
+          f"(the disk is written from another thread)")
+    print(f"open: {results['open ms']:6.2f} ms for {store.totals['games']} games")
+    return results
+
+
+def bench_snapshot(calls=5000):
+    """Snapshot and restore cost against building a fresh engine"""
+    from engine import SnakeEngine
+
+    results = {}
+    for length in (1, 450, 899):
+        engine = _snake_on_cycle(length)[0]
+        start = time.perf_counter()
+        for _ in range(calls):
+            data = engine.snapshot()
+        snapshot = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(calls):
+            engine.restore(data)
+        restore = time.perf_counter() - start
+
+        results[f"snapshot length={length} us"] = snapshot / calls * 1e6
+        results[f"restore length={length} us"] = restore / calls * 1e6
+        print(f"length={length:>4}: snapshot {snapshot / calls * 1e6:6.1f} us, "
+              f"restore {restore / calls * 1e6:6.1f} us, {len(data):,} bytes")
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        SnakeEngine(30, 30, seed=0)
+    fresh = results['new engine us'] = (time.perf_counter() - start) / calls * 1e6
+    print(f"new SnakeEngine: {fresh:6.1f} us")
+    return results
+
+
+BENCHMARKS = {
+    'autopilot': bench_autopilot,
+    'batch': bench_batch,
+    'frame': bench_frame,
+    'palette': bench_palette,
+    'particles': bench_particles,
+    'rollout': bench_rollout,
+    'scores': bench_scores,
+    'snapshot': bench_snapshot,
+    'spawn': bench_spawn,
+    'tick': bench_tick,
+}
+
+
+def compare(results, baseline, threshold):
+    """Print each metric against the baseline; returns the regressed metrics"""
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            before = baseline.get(name, {}).get(metric)
+            if not before:
+                continue
+            change = value / before - 1
+            worse = -change if metric.endswith('/s') else change
+            flag = ''
+            if worse > threshold:
+                flag = '  REGRESSION'
+                regressions.append(f"{name}: {metric}")
+            print(f"{name:>9} {metric:<28} {before:>14,.2f} -> {value:>14,.2f} ({change:+7.1%}){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('names', nargs='+', choices=sorted(BENCHMARKS) + ['all'],
+                        metavar='name', help=f"one of {', '.join(sorted(BENCHMARKS))} or all")
+    parser.add_argument('--json', metavar='FILE', help="write the results as JSON")
+    parser.add_argument('--compare', metavar='FILE', help="compare against a saved --json run")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="relative slowdown that counts as a regression (default 0.10)")
+    args = parser.parse_args()
+
+    names = sorted(BENCHMARKS) if 'all' in args.names else args.names
+    results = {}
+    for name in names:
+        print(f"== {name}")
+        results[name] = BENCHMARKS[name]()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'machine': platform.platform(),
+                       'results': results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        print(f"== compared with {args.compare}")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
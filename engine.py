@@ -0,0 +1,561 @@
+import random
+import struct
+from array import array
+from collections import deque
+from functools import lru_cache
+
+from powerups import POWER_UPS, EffectWheel
+
+# Directions as (dx, dy); screen y grows downwards
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+
+# Clockwise order; the index is the compact 2-bit direction code
+DIRECTIONS = (UP, RIGHT, DOWN, LEFT)
+
+# Power-up names in registry order; the index is their compact code
+POWER_UP_TYPES = POWER_UPS.names
+
+# Only used to pick seeds for games started without one
+_seed_source = random.SystemRandom()
+
+# Snapshot layout (native byte order): this header, the body cells head
+# first, then the engine's occupancy, free-cell and free-position arrays
+# byte for byte, the 625 words of the Mersenne Twister state, and a
+# (power-up index, ticks left) pair per running effect. Body cells
+# are y * cols + x, as uint16 on boards of up to 65536 cells and uint32
+# above; food, power-up and vacated cells are stored plus one, with 0 for
+# none. Directions pack as direction | last_move << 2. The board arrays
+# cost a few bytes per cell but restore as plain copies.
+SNAPSHOT_MAGIC = b'SNKS'
+SNAPSHOT_VERSION = 2
+_SNAPSHOT = struct.Struct('=4sBHHQIIiIIBIBBIIBBdB')
+_EFFECT = struct.Struct('=Bi')
+_RNG_WORDS = 625
+
+
+@lru_cache(maxsize=8)
+def _cells(cols, rows):
+    """(x, y) of every cell index, so restoring a body is a lookup per segment"""
+    return tuple((index % cols, index // cols) for index in range(cols * rows))
+
+
+def snapshot_board(data):
+    """(cols, rows) of the board a snapshot was taken on"""
+    if len(data) < _SNAPSHOT.size:
+        raise ValueError("truncated snake snapshot")
+    magic, version, cols, rows = _SNAPSHOT.unpack_from(data)[:4]
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("not a snake snapshot")
+    return cols, rows
+
+
+class Occupancy:
+    """Body segments per cell, plus a swap-remove array of the free cells.
+
+    Cells are (x, y), indexed y * cols + x in the arrays. Occupying and
+    vacating a cell are O(1), and so is drawing a uniformly random free
+    cell, so nothing here depends on how long the snakes are.
+    """
+
+    __slots__ = ('cols', 'counts', 'free', 'free_pos')
+
+    def __init__(self, cols, rows, counts=None, free=None, free_pos=None):
+        """An empty board, or one rebuilt from the three arrays (see SnakeEngine.snapshot)"""
+        cells = cols * rows
+        self.cols = cols
+        self.counts = bytearray(cells) if counts is None else counts  # segments per cell
+        self.free = array('i', range(cells)) if free is None else free  # uncovered cells
+        # cell -> index in free, -1 if occupied
+        self.free_pos = array('i', range(cells)) if free_pos is None else free_pos
+
+    def occupy(self, cell):
+        """Add a segment; returns the slot the cell left in `free`, -1 if it was covered already"""
+        index = cell[1] * self.cols + cell[0]
+        self.counts[index] += 1
+        if self.counts[index] != 1:
+            return -1
+        # Swap-remove the cell from the free list
+        pos = self.free_pos[index]
+        last = self.free.pop()
+        if last != index:
+            self.free[pos] = last
+            self.free_pos[last] = pos
+        self.free_pos[index] = -1
+        return pos
+
+    def vacate(self, cell):
+        index = cell[1] * self.cols + cell[0]
+        self.counts[index] -= 1
+        if self.counts[index] == 0:
+            self.free_pos[index] = len(self.free)
+            self.free.append(index)
+
+    # Exact inverses, free-list order included, for taking moves back in
+    # the reverse order they were made
+
+    def unoccupy(self, cell, pos):
+        """Undo the `occupy` of `cell` that returned `pos`"""
+        index = cell[1] * self.cols + cell[0]
+        self.counts[index] -= 1
+        if pos < 0:
+            return
+        free = self.free
+        if pos < len(free):
+            # Put back the cell that was swapped into the slot
+            last = free[pos]
+            self.free_pos[last] = len(free)
+            free.append(last)
+            free[pos] = index
+        else:
+            free.append(index)
+        self.free_pos[index] = pos
+
+    def unvacate(self, cell):
+        """Undo the last `vacate`, which was of `cell`"""
+        index = cell[1] * self.cols + cell[0]
+        self.counts[index] += 1
+        if self.counts[index] == 1:
+            self.free.pop()
+            self.free_pos[index] = -1
+
+    def is_occupied(self, cell):
+        """True if any body segment covers the cell"""
+        return self.counts[cell[1] * self.cols + cell[0]] > 0
+
+    def random_free(self, rng, exclude=None):
+        """A uniformly random free cell drawn from `rng`, other than `exclude`; None if none is left"""
+        free = self.free
+        count = len(free)
+        cols = self.cols
+        if exclude is None or self.free_pos[exclude[1] * cols + exclude[0]] < 0:
+            if not count:
+                return None
+            index = free[rng.randrange(count)]
+        else:
+            # Draw from all but the last slot and let the last slot stand in
+            # for the excluded cell's
+            if count < 2:
+                return None
+            pos = rng.randrange(count - 1)
+            if pos == self.free_pos[exclude[1] * cols + exclude[0]]:
+                pos = count - 1
+            index = free[pos]
+        return (index % cols, index // cols)
+
+
+class SnakeEngine:
+    """Headless game rules: snake, food, power-ups, score and timers.
+
+    Never imports tkinter, so thousands of games can be stepped without a
+    display. `step` returns the events of the tick so a view can add effects.
+
+    The body is a deque (head at index 0) mirrored by an Occupancy board,
+    so collision checks, growth and spawning are all O(1) regardless of
+    snake length.
+
+    Food and power-ups are drawn from a per-game `random.Random(seed)`, so a
+    seed plus the same inputs always replays the same game. Set `recorder`
+    (see replay.ReplayWriter) to log every direction change as it is applied,
+    and `history` (a rewind.RewindBuffer) to be able to `undo` ticks.
+    """
+
+    def __init__(self, cols=30, rows=30, seed=None):
+        self.cols = cols
+        self.rows = rows
+        self.high_score = 0
+        self.recorder = None
+        self.history = None  # RewindBuffer for an undo record per tick, or None
+        self.dirty = None  # set to a list to collect the cells each tick changes
+        self.effects = EffectWheel()  # running power-up effects, keyed by name
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """Start a new game, keeping the high score; a fresh seed is drawn if none is given"""
+        if seed is None:
+            seed = _seed_source.getrandbits(63)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.dirty_all = True  # everything changed; views must redraw from scratch
+        if self.dirty is not None:
+            self.dirty.clear()
+        if self.history is not None:
+            self.history.clear()
+
+        self.board = Occupancy(self.cols, self.rows)
+        start = (self.cols // 2, self.rows // 2)  # Start in center
+        self.snake = deque([start])
+        self.board.occupy(start)
+        self.direction = RIGHT
+        self._moved = RIGHT  # direction of the last move, for the recorder
+        self.food = self.spawn_food()
+        self.score = 0
+        self.game_over = False
+        self.won = False
+        self.tick = 0
+        self.vacated = None  # tail cell given up on the last tick, if any
+
+        # Power-ups
+        self.power_up = None
+        self.power_up_timer = 0
+        self.effects.clear()
+
+    def snapshot(self):
+        """The whole game as compact bytes, RNG state included; see restore"""
+        cols = self.cols
+        typecode = 'H' if cols * self.rows <= 0x10000 else 'I'
+        body = array(typecode, [y * cols + x for x, y in self.snake])
+        rng_version, words, gauss = self.rng.getstate()
+        power_up = self.power_up
+        header = _SNAPSHOT.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, cols, self.rows, self.seed, self.tick,
+            self.score, self.power_up_timer,
+            self._cell_code(self.food), self._cell_code(power_up),
+            POWER_UP_TYPES.index(power_up[2]) if power_up else 0,
+            self._cell_code(self.vacated),
+            DIRECTIONS.index(self.direction) | DIRECTIONS.index(self._moved) << 2,
+            self.game_over | self.won << 1, len(body), len(self.board.free),
+            rng_version, gauss is not None, gauss or 0.0, len(self.effects))
+        effects = [_EFFECT.pack(POWER_UP_TYPES.index(name), self.effects.remaining(name, self.tick))
+                   for name in self.effects.expires]
+        board = self.board
+        return b''.join((header, body.tobytes(), board.counts, board.free.tobytes(),
+                         board.free_pos.tobytes(), array('I', words).tobytes(), *effects))
+
+    def restore(self, data):
+        """Put the game back exactly as `snapshot` saw it, keeping the high score.
+
+        The board size comes from the snapshot too, so any engine can take
+        any snapshot. Play continues identically, food spawns included. A
+        recorder is left attached but no longer describes the game.
+
+        Raises ValueError for data that is not a whole, consistent snapshot,
+        and then leaves the game as it was.
+        """
+        if len(data) < _SNAPSHOT.size:
+            raise ValueError("truncated snake snapshot")
+        (magic, version, cols, rows, seed, tick, score, power_up_timer, food, power_up,
+         power_type, vacated, directions, flags, length, free_count, rng_version, has_gauss,
+         gauss, effect_count) = _SNAPSHOT.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("not a snake snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported snapshot version {version}")
+
+        # Check the size before allocating anything the header asks for
+        cells = cols * rows
+        body = array('H' if cells <= 0x10000 else 'I')
+        occupied_at = _SNAPSHOT.size + length * body.itemsize
+        free_at = occupied_at + cells
+        effects_at = free_at + (free_count + cells + _RNG_WORDS) * 4
+        if len(data) != effects_at + effect_count * _EFFECT.size:
+            raise ValueError("truncated snake snapshot")
+
+        view = memoryview(data)
+        free, free_pos, words = array('i'), array('i'), array('I')
+        body.frombytes(view[_SNAPSHOT.size:occupied_at])
+        start = free_at
+        for values, count in ((free, free_count), (free_pos, cells), (words, _RNG_WORDS)):
+            end = start + count * values.itemsize
+            values.frombytes(view[start:end])
+            start = end
+        effects = list(_EFFECT.iter_unpack(view[effects_at:]))
+
+        if not (cells and 0 < length <= cells and free_count <= cells) or max(body) >= cells:
+            raise ValueError("snapshot body does not fit its board")
+        if free and (min(free) < 0 or max(free) >= cells):
+            raise ValueError("snapshot free cells are off the board")
+
+        # The board arrays must describe exactly this body: the counts it
+        # gives, and free / free_pos as inverse maps over the empty cells
+        counts = bytearray(cells)
+        try:
+            for index in body:
+                counts[index] += 1
+        except ValueError:
+            raise ValueError("snapshot body overlaps itself too often") from None
+        if counts != view[occupied_at:free_at]:
+            raise ValueError("snapshot occupancy does not match its body")
+        if counts.count(0) != free_count or free_pos.count(-1) != cells - free_count:
+            raise ValueError("snapshot free cells do not match its body")
+        for pos, index in enumerate(free):
+            if free_pos[index] != pos or counts[index]:
+                raise ValueError("snapshot free cells do not match its body")
+
+        if max(food, power_up, vacated) > cells or directions >= 16:
+            raise ValueError("snapshot cell or direction is out of range")
+        if (power_up and power_type >= len(POWER_UP_TYPES)) or any(
+                index >= len(POWER_UP_TYPES) for index, remaining in effects):
+            raise ValueError("snapshot names an unknown power-up")
+        if rng_version != 3 or words[-1] > 624:
+            raise ValueError("snapshot RNG state is invalid")
+
+        # Nothing below can fail
+        self.cols = cols
+        self.rows = rows
+        self.seed = seed
+        self.rng.setstate((rng_version, tuple(words), gauss if has_gauss else None))
+        self.board = Occupancy(cols, rows, counts, free, free_pos)
+        self.snake = deque(map(_cells(cols, rows).__getitem__, body))
+
+        self.tick = tick
+        self.score = score
+        self.food = self._code_cell(food)
+        self.power_up = self._code_cell(power_up)
+        if self.power_up:
+            self.power_up += (POWER_UP_TYPES[power_type],)
+        self.power_up_timer = power_up_timer
+        self.effects.clear()
+        for index, remaining in effects:
+            self.effects.schedule(POWER_UP_TYPES[index], tick + remaining)
+        self.vacated = self._code_cell(vacated)
+        self.direction = DIRECTIONS[directions & 3]
+        self._moved = DIRECTIONS[directions >> 2]
+        self.game_over = bool(flags & 1)
+        self.won = bool(flags & 2)
+        self.high_score = max(self.high_score, score)
+        self.dirty_all = True
+        if self.dirty is not None:
+            self.dirty.clear()
+        if self.history is not None:
+            self.history.clear()
+
+    def _cell_code(self, cell):
+        return 0 if cell is None else cell[1] * self.cols + cell[0] + 1
+
+    def _code_cell(self, code):
+        return None if code == 0 else ((code - 1) % self.cols, (code - 1) // self.cols)
+
+    def _mark(self, cell):
+        if self.dirty is not None:
+            self.dirty.append(cell)
+
+    def is_occupied(self, cell):
+        """True if any body segment covers the cell"""
+        return self.board.counts[cell[1] * self.cols + cell[0]] > 0
+
+    @property
+    def invincible(self):
+        """Ticks left of the longest running effect that makes the snake invulnerable"""
+        return max((self.effects.remaining(name, self.tick) for name in self.effects.expires
+                    if POWER_UPS[name].invulnerable), default=0)
+
+    @property
+    def speed_boost(self):
+        """Ticks left of the longest running effect that changes the game speed"""
+        return max((self.effects.remaining(name, self.tick) for name in self.effects.expires
+                    if POWER_UPS[name].tick_scale != 1), default=0)
+
+    @property
+    def tick_scale(self):
+        """How much longer (or, below 1, shorter) ticks should take with the running effects"""
+        scale = 1.0
+        for name in self.effects.expires:
+            scale *= POWER_UPS[name].tick_scale
+        return scale
+
+    def active_effects(self):
+        """(PowerUp, ticks left) for each running effect, in registry order"""
+        return [(power_up, self.effects.remaining(power_up.name, self.tick))
+                for power_up in POWER_UPS if power_up.name in self.effects]
+
+    @property
+    def occupancy(self):
+        """Body segments per cell, indexed y * cols + x; treat as read-only"""
+        return self.board.counts
+
+    def spawn_food(self):
+        """Pick a random cell not covered by the body, or None if the board is full"""
+        return self.board.random_free(self.rng)
+
+    def spawn_power_up(self):
+        if self.rng.random() < 0.3:  # 30% chance
+            cell = self.board.random_free(self.rng, exclude=self.food)
+            if cell is None:
+                return
+            self.power_up = (cell[0], cell[1], POWER_UPS.choose(self.rng))
+            self._mark(self.power_up[:2])
+            self.power_up_timer = 100  # Disappears after 100 game ticks
+
+    def turn(self, direction):
+        """Change direction unless it reverses the last move; returns whether it did.
+
+        Checked against the move actually made rather than a turn still
+        pending, so a turn can always be replaced by any turn that is valid.
+        """
+        dx, dy = self._moved
+        if direction == (-dx, -dy):
+            return False
+        self.direction = direction
+        return True
+
+    def step(self, action=None):
+        """Advance one tick and return a list of (kind, x, y, value) events.
+
+        Event kinds are 'food' (value: points), 'power_up' (value: type),
+        'death' (x, y: the head before the fatal move; value: 'wall' or
+        'body') and 'win' (the board is full, so no food can be spawned).
+        """
+        if self.game_over:
+            return []
+        history = self.history
+        if history is not None:
+            # What undo needs; the RNG state and the head's free-list slot
+            # are filled in below if the tick uses them
+            undo = [self.tick, self.score, self._moved, self.food, self.power_up,
+                    self.power_up_timer, self.vacated,
+                    dict(self.effects.expires) if self.effects else None, None, -1]
+            history.push(undo)
+        if action is not None:
+            self.turn(action)
+        if self.direction != self._moved:
+            self._moved = self.direction
+            if self.recorder:
+                self.recorder.record(self.tick, self.direction)
+
+        events = []
+
+        # Running effects, as they stand before anything is picked up this tick
+        invulnerable = False
+        multiplier = 1
+        for name in self.effects.expires:
+            power_up = POWER_UPS[name]
+            invulnerable = invulnerable or power_up.invulnerable
+            multiplier *= power_up.score_multiplier
+
+        # Get new head position
+        head_x, head_y = self.snake[0]
+        dx, dy = self.direction
+        new_head = (head_x + dx, head_y + dy)
+
+        # Check wall collision (unless invincible)
+        if not invulnerable:
+            if (new_head[0] < 0 or new_head[0] >= self.cols or
+                new_head[1] < 0 or new_head[1] >= self.rows):
+                return self._die(events, 'wall')
+        else:
+            # Wrap around when invincible
+            new_head = (new_head[0] % self.cols, new_head[1] % self.rows)
+
+        # Check self collision (unless invincible)
+        if not invulnerable and self.is_occupied(new_head):
+            return self._die(events, 'body')
+
+        self.tick += 1
+        self.vacated = None
+
+        # Add new head
+        self.snake.appendleft(new_head)
+        pos = self.board.occupy(new_head)
+        self._mark(new_head)
+        if history is not None:
+            undo[-1] = pos
+
+        # Check food collision
+        if new_head == self.food:
+            points = 10 * multiplier  # e.g. double points during speed boost
+            self.score += points
+            events.append(('food', self.food[0], self.food[1], points))
+
+            if history is not None:
+                undo[-2] = self.rng.getstate()  # only ticks that spawn need it
+            self.food = self.spawn_food()
+            if self.food is None:
+                # Nowhere left to put food: the snake fills the board
+                self.won = True
+                self._finish()
+                events.append(('win', new_head[0], new_head[1], None))
+            else:
+                self._mark(self.food)
+                # Chance to spawn power-up
+                self.spawn_power_up()
+        else:
+            # Remove tail if no food eaten
+            self.vacated = self.snake.pop()
+            self.board.vacate(self.vacated)
+            self._mark(self.vacated)
+
+        # Check power-up collision
+        if self.power_up and new_head == (self.power_up[0], self.power_up[1]):
+            power_x, power_y, power_type = self.power_up
+            power_up = POWER_UPS[power_type]
+            self.score += power_up.points
+            if power_up.duration:
+                self.effects.start(power_type, power_up, self.tick)
+            events.append(('power_up', power_x, power_y, power_type))
+
+            self.power_up = None
+
+        # Update power-up timer
+        if self.power_up:
+            self.power_up_timer -= 1
+            if self.power_up_timer <= 0:
+                self._mark(self.power_up[:2])
+                self.power_up = None
+
+        # End the effects that run out with this tick
+        if self.effects:
+            self.effects.advance(self.tick)
+
+        # Update high score
+        if self.score > self.high_score:
+            self.high_score = self.score
+
+        return events
+
+    def undo(self):
+        """Take back the newest tick kept in `history`; returns False once there is none.
+
+        The game goes back exactly, free-cell order and RNG state included,
+        so playing on spawns what it would have. Only the cells the tick
+        changed are touched, so this is O(1), like `step`. The direction is
+        set to the tick's previous move. High score and recorder are left
+        alone.
+        """
+        record = self.history.pop() if self.history is not None else None
+        if record is None:
+            return False
+        (tick, score, moved, food, power_up, power_up_timer, vacated, effects, rng_state,
+         head_pos) = record
+
+        if self.tick != tick:
+            # The snake moved: bring the tail back, then take the head away
+            if self.vacated is not None:
+                self.board.unvacate(self.vacated)
+                self.snake.append(self.vacated)
+                self._mark(self.vacated)
+            head = self.snake.popleft()
+            self.board.unoccupy(head, head_pos)
+            self._mark(head)
+        if rng_state is not None:
+            self.rng.setstate(rng_state)
+        for cell in (self.food, food, self.power_up, power_up):
+            if cell is not None:
+                self._mark(cell[:2])
+
+        self.tick = tick
+        self.score = score
+        self.food = food
+        self.power_up = power_up
+        self.power_up_timer = power_up_timer
+        self.vacated = vacated
+        self.effects.clear()
+        if effects:
+            for name, expires in effects.items():
+                self.effects.schedule(name, expires)
+        self.direction = self._moved = moved
+        self.game_over = self.won = False
+        return True
+
+    def _finish(self):
+        self.game_over = True
+        if self.recorder:
+            self.recorder.finish(self.tick, self.score)
+
+    def _die(self, events, cause):
+        self._finish()
+        head_x, head_y = self.snake[0]
+        events.append(('death', head_x, head_y, cause))
+        return events
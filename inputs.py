@@ -0,0 +1,67 @@
+"""Keyboard turns queued between game ticks."""
+import time
+from array import array
+from collections import deque
+
+
+class InputQueue:
+    """Turns pressed between ticks, applied one per tick in the order pressed.
+
+    Two quick presses within one tick (up then left) become two turns on
+    consecutive ticks instead of the second overwriting the first. A press
+    that repeats or reverses the turn queued before it is dropped at once,
+    as is anything past `depth` queued turns; when its tick comes, each
+    turn is checked again by engine.turn against the last move actually
+    made.
+
+    The time from key press to the tick that applies the turn is kept for
+    the last `capacity` turns.
+    """
+
+    def __init__(self, depth=3, capacity=256):
+        self.depth = depth
+        self._pending = deque()  # (direction, perf_counter() at the press)
+        self._latencies = array('d', bytes(8 * capacity))
+        self._count = 0  # latencies ever recorded
+        self.applied = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def push(self, direction, when=None):
+        """Queue a turn pressed at `when` (default now); returns False if it was dropped"""
+        if self._pending:
+            dx, dy = self._pending[-1][0]
+            if direction in ((dx, dy), (-dx, -dy)) or len(self._pending) >= self.depth:
+                self.dropped += 1
+                return False
+        self._pending.append((direction, time.perf_counter() if when is None else when))
+        return True
+
+    def apply(self, engine):
+        """Turn the engine by the oldest queued turn that changes its direction.
+
+        Call once per tick, just before engine.step. Returns the direction
+        applied, or None.
+        """
+        while self._pending:
+            direction, pressed = self._pending.popleft()
+            if direction != engine.direction and engine.turn(direction):
+                self._latencies[self._count % len(self._latencies)] = time.perf_counter() - pressed
+                self._count += 1
+                self.applied += 1
+                return direction
+            self.dropped += 1
+        return None
+
+    def clear(self):
+        self._pending.clear()
+
+    def latency(self, *points):
+        """Press-to-tick latency in milliseconds at the given percentiles (0-100)"""
+        recent = sorted(self._latencies[:min(self._count, len(self._latencies))])
+        if not recent:
+            return [0.0 for _ in points]
+        last = len(recent) - 1
+        return [recent[min(last, int(p / 100 * len(recent)))] * 1000 for p in points]
@@ -0,0 +1,535 @@
+"""Networked multiplayer: an asyncio server that runs an Arena and sends each
+tick's changes, and the client-side copy of the board the Tk view draws.
+
+Run `python netplay.py serve` to host a game, `python snake.py --connect
+HOST:PORT` to join it, and `python netplay.py loadtest` to measure the server
+under many bot clients.
+
+Wire format. Clients send one byte per input: a direction code (an index
+into engine.DIRECTIONS) or RESPAWN. The server sends frames of
+varint(length) + payload, integers being unsigned varints as in replay.py
+and cells y * cols + x, plus one where a cell may be absent:
+
+    WELCOME  player_id cols rows tick food+1 power_up+1 [type]
+             players (id score length cells...)*
+    TICK     tick event*
+
+A tick lists only what changed. Most snakes just move, which costs an op
+byte holding the direction plus the snake id, since the client can work out
+the new head and knows the tail:
+
+    MOVE+code id    GROW+code id    EAT id points    TAKE id type
+    FOOD cell+1     POWER cell+1 [type]    SPAWN id cell    DEATH id
+"""
+import asyncio
+import random
+import socket
+from collections import deque
+
+from arena import Arena
+from engine import DIRECTIONS, POWER_UP_TYPES, SnakeEngine
+from powerups import POWER_UPS, EffectWheel
+from replay import _read_varint, encode_varint
+
+RESPAWN = 4  # client byte asking to restart after dying
+
+WELCOME = 1
+TICK = 2
+
+# Tick ops; MOVE and GROW carry the direction code in their low two bits
+MOVE = 0x00
+GROW = 0x04
+EAT = 0x08
+TAKE = 0x09
+FOOD = 0x0a
+POWER = 0x0b
+SPAWN = 0x0c
+DEATH = 0x0d
+
+
+def _frame(payload):
+    return encode_varint(len(payload)) + payload
+
+
+def _cell_code(cols, cell):
+    return 0 if cell is None else cell[1] * cols + cell[0] + 1
+
+
+def _power_code(cols, power_up):
+    if power_up is None:
+        return b'\0'
+    return (encode_varint(power_up[1] * cols + power_up[0] + 1)
+            + bytes([POWER_UP_TYPES.index(power_up[2])]))
+
+
+def encode_welcome(arena, player_id):
+    """The whole board, sent once when a client joins"""
+    cols = arena.cols
+    out = bytearray([WELCOME])
+    for value in (player_id, cols, arena.rows, arena.tick, _cell_code(cols, arena.food)):
+        out += encode_varint(value)
+    out += _power_code(cols, arena.power_up)
+    players = [p for p in arena.players.values() if p.body is not None]
+    out += encode_varint(len(players))
+    for player in players:
+        out += encode_varint(player.id) + encode_varint(player.score)
+        out += encode_varint(len(player.body))
+        for x, y in player.body:
+            out += encode_varint(y * cols + x)
+    return _frame(bytes(out))
+
+
+def encode_tick(arena, events):
+    """One tick's events from Arena.step"""
+    cols = arena.cols
+    out = bytearray([TICK]) + encode_varint(arena.tick)
+    for event in events:
+        kind = event[0]
+        if kind == 'move':
+            out.append(MOVE | event[2])
+            out += encode_varint(event[1])
+        elif kind == 'grow':
+            out.append(GROW | event[2])
+            out += encode_varint(event[1])
+        elif kind == 'eat':
+            out.append(EAT)
+            out += encode_varint(event[1]) + encode_varint(event[2])
+        elif kind == 'take':
+            out.append(TAKE)
+            out += encode_varint(event[1]) + bytes([POWER_UP_TYPES.index(event[2])])
+        elif kind == 'food':
+            out.append(FOOD)
+            out += encode_varint(_cell_code(cols, event[1]))
+        elif kind == 'power_up':
+            out.append(POWER)
+            out += _power_code(cols, event[1])
+        elif kind == 'spawn':
+            out.append(SPAWN)
+            out += encode_varint(event[1]) + encode_varint(_cell_code(cols, event[2]) - 1)
+        elif kind == 'death':
+            out.append(DEATH)
+            out += encode_varint(event[1])
+    return _frame(bytes(out))
+
+
+class ArenaServer:
+    """Runs an Arena on a fixed tick and keeps every connected client in sync.
+
+    Each tick is encoded once and the same bytes are written to every
+    client. A client whose unsent backlog passes `max_backlog` bytes is
+    disconnected rather than allowed to hold up or bloat the server.
+    """
+
+    def __init__(self, arena, tick_interval=0.15, max_backlog=1 << 20):
+        self.arena = arena
+        self.tick_interval = tick_interval
+        self.max_backlog = max_backlog
+        self.lateness = deque(maxlen=10000)  # seconds each recent tick started late
+        self.bytes_sent = 0
+        self._clients = {}  # player id -> StreamWriter
+        self._handlers = set()  # one task per connection
+        self._server = None
+        self._ticker = None
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Listen and start ticking; returns the (host, port) actually bound"""
+        self._server = await asyncio.start_server(self._serve_client, host, port)
+        self._ticker = asyncio.create_task(self._run())
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        self._ticker.cancel()
+        self._server.close()
+        for player_id in list(self._clients):
+            self._drop(player_id)
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+
+    def _drop(self, player_id):
+        writer = self._clients.pop(player_id, None)
+        if writer is not None:
+            writer.close()
+            self.arena.leave(player_id)
+
+    async def _serve_client(self, reader, writer):
+        writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        player_id = self.arena.join()
+        self._clients[player_id] = writer
+        welcome = encode_welcome(self.arena, player_id)
+        self.bytes_sent += len(welcome)
+        writer.write(welcome)
+        try:
+            while True:
+                data = await reader.read(256)
+                if not data:
+                    break
+                for code in data:
+                    if code < len(DIRECTIONS):
+                        self.arena.turn(player_id, DIRECTIONS[code])
+                    elif code == RESPAWN:
+                        self.arena.respawn(player_id)
+        except ConnectionError:
+            pass
+        finally:
+            self._drop(player_id)
+            self._handlers.discard(task)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            deadline += self.tick_interval
+            await asyncio.sleep(deadline - loop.time())
+            now = loop.time()
+            self.lateness.append(now - deadline)
+            if now - deadline > self.tick_interval:
+                deadline = now  # fell a whole tick behind: skip, don't burst
+
+            frame = encode_tick(self.arena, self.arena.step())
+            for player_id, writer in list(self._clients.items()):
+                if writer.transport.get_write_buffer_size() > self.max_backlog:
+                    self._drop(player_id)
+                    continue
+                writer.write(frame)
+                self.bytes_sent += len(frame)
+
+
+class RemoteArena:
+    """Client-side copy of a server's arena, shaped like a SnakeEngine.
+
+    The attributes the Tk view reads (snake, food, score, dirty cells, ...)
+    describe this client's own snake on the shared board. `step` takes in
+    whatever the server has sent without blocking and returns this
+    player's events in SnakeEngine.step form; `turn` and `reset` send
+    inputs instead of applying them.
+    """
+
+    recorder = None
+    won = False
+    seed = 0
+
+    def __init__(self, host, port, timeout=5.0):
+        self._socket = socket.create_connection((host, port), timeout=timeout)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._buffer = bytearray()
+        self.connected = True
+        self.dirty = None
+        self.dirty_all = True
+        self.high_score = 0
+        self.direction = DIRECTIONS[1]
+        self.vacated = None
+        self._events = []
+
+        # The view needs the board size before its first frame, so wait for
+        # the welcome here; everything after it is read without blocking
+        while not self._read_frames():
+            data = self._socket.recv(65536)
+            if not data:
+                raise ConnectionError("server closed the connection")
+            self._buffer += data
+        self._socket.setblocking(False)
+
+    # -- the SnakeEngine surface used by the view ----------------------------------------
+
+    @property
+    def snake(self):
+        return self.bodies.get(self.player_id) or self._last_body
+
+    # This player's effects are tracked just like the engine's
+    invincible = SnakeEngine.invincible
+    speed_boost = SnakeEngine.speed_boost
+    active_effects = SnakeEngine.active_effects
+
+    def is_occupied(self, cell):
+        return self._occupied[cell[1] * self.cols + cell[0]] > 0
+
+    def turn(self, direction):
+        self.direction = direction
+        self._send(DIRECTIONS.index(direction))
+
+    def reset(self, seed=None):
+        """Ask the server to restart this player's snake"""
+        self._send(RESPAWN)
+
+    def step(self, action=None):
+        if action is not None:
+            self.turn(action)
+        while self.connected:
+            try:
+                data = self._socket.recv(65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                data = b''
+            if not data:
+                self._disconnect()
+                break
+            self._buffer += data
+        self._read_frames()
+        events, self._events = self._events, []
+        return events
+
+    def _send(self, code):
+        if self.connected:
+            try:
+                self._socket.send(bytes([code]))
+            except OSError:
+                self._disconnect()
+
+    def _disconnect(self):
+        self.connected = False
+        self._socket.close()
+        if not self.game_over:
+            self.game_over = True
+            x, y = self.snake[0]
+            self._events.append(('death', x, y, None))
+
+    # -- applying server frames ----------------------------------------------------------
+
+    def _read_frames(self):
+        """Apply every complete frame in the buffer; returns how many there were"""
+        buffer = self._buffer
+        pos = count = 0
+        while True:
+            try:
+                length, start = _read_varint(buffer, pos)
+            except EOFError:
+                break
+            if start + length > len(buffer):
+                break
+            payload = bytes(buffer[start:start + length])
+            if payload[0] == WELCOME:
+                self._apply_welcome(payload)
+            else:
+                self._apply_tick(payload)
+            pos = start + length
+            count += 1
+        del buffer[:pos]
+        return count
+
+    def _mark(self, cell):
+        if self.dirty is not None:
+            self.dirty.append(cell)
+
+    def _occupy(self, cell):
+        self._occupied[cell[1] * self.cols + cell[0]] += 1
+        self._mark(cell)
+
+    def _vacate(self, cell):
+        self._occupied[cell[1] * self.cols + cell[0]] -= 1
+        self._mark(cell)
+
+    def _cell(self, code):
+        return None if code == 0 else ((code - 1) % self.cols, (code - 1) // self.cols)
+
+    def _read_power_up(self, payload, pos):
+        code, pos = _read_varint(payload, pos)
+        if code == 0:
+            return None, pos
+        x, y = self._cell(code)
+        return (x, y, POWER_UP_TYPES[payload[pos]]), pos + 1
+
+    def _apply_welcome(self, payload):
+        pos = 1
+        self.player_id, pos = _read_varint(payload, pos)
+        self.cols, pos = _read_varint(payload, pos)
+        self.rows, pos = _read_varint(payload, pos)
+        self.tick, pos = _read_varint(payload, pos)
+        food, pos = _read_varint(payload, pos)
+        self.food = self._cell(food)
+        self.power_up, pos = self._read_power_up(payload, pos)
+
+        self._occupied = bytearray(self.cols * self.rows)
+        self.bodies = {}
+        self.scores = {}
+        count, pos = _read_varint(payload, pos)
+        for _ in range(count):
+            player_id, pos = _read_varint(payload, pos)
+            self.scores[player_id], pos = _read_varint(payload, pos)
+            length, pos = _read_varint(payload, pos)
+            body = deque()
+            for _ in range(length):
+                index, pos = _read_varint(payload, pos)
+                body.append((index % self.cols, index // self.cols))
+                self._occupied[index] += 1
+            self.bodies[player_id] = body
+
+        self._last_body = deque(self.bodies.get(self.player_id) or [(0, 0)])
+        self.score = self.scores.get(self.player_id, 0)
+        self.game_over = self.player_id not in self.bodies
+        self.effects = EffectWheel()
+        self.dirty_all = True
+
+    def _apply_tick(self, payload):
+        me = self.player_id
+        events = self._events
+        self.tick, pos = _read_varint(payload, 1)
+        if me in self.bodies:
+            self.vacated = None
+        while pos < len(payload):
+            op = payload[pos]
+            pos += 1
+            if op < EAT:
+                player_id, pos = _read_varint(payload, pos)
+                body = self.bodies[player_id]
+                dx, dy = DIRECTIONS[op & 3]
+                head = ((body[0][0] + dx) % self.cols, (body[0][1] + dy) % self.rows)
+                body.appendleft(head)
+                self._occupy(head)
+                if op < GROW:
+                    tail = body.pop()
+                    self._vacate(tail)
+                    if player_id == me:
+                        self.vacated = tail
+            elif op == EAT:
+                player_id, pos = _read_varint(payload, pos)
+                points, pos = _read_varint(payload, pos)
+                self.scores[player_id] += points
+                if player_id == me:
+                    x, y = self.bodies[me][0]
+                    events.append(('food', x, y, points))
+            elif op == TAKE:
+                player_id, pos = _read_varint(payload, pos)
+                power_type = POWER_UP_TYPES[payload[pos]]
+                pos += 1
+                power_up = POWER_UPS[power_type]
+                self.scores[player_id] += power_up.points
+                if player_id == me:
+                    if power_up.duration:
+                        self.effects.start(power_type, power_up, self.tick)
+                    x, y = self.bodies[me][0]
+                    events.append(('power_up', x, y, power_type))
+            elif op == FOOD:
+                code, pos = _read_varint(payload, pos)
+                self.food = self._cell(code)
+            elif op == POWER:
+                self.power_up, pos = self._read_power_up(payload, pos)
+            elif op == SPAWN:
+                player_id, pos = _read_varint(payload, pos)
+                index, pos = _read_varint(payload, pos)
+                cell = (index % self.cols, index // self.cols)
+                self._remove(player_id)  # a joining client already has itself
+                self.bodies[player_id] = deque([cell])
+                self.scores[player_id] = 0
+                self._occupy(cell)
+                if player_id == me:
+                    self.game_over = False
+                    self.effects.clear()
+            elif op == DEATH:
+                player_id, pos = _read_varint(payload, pos)
+                body = self._remove(player_id)
+                if player_id == me and body:
+                    self._last_body = deque([body[0]])
+                    self.game_over = True
+                    self.effects.clear()
+                    events.append(('death', body[0][0], body[0][1], None))
+            else:
+                raise ValueError(f"unknown tick op {op:#x}")
+
+        # Effects wear off at the end of the tick, as on the server
+        if me in self.bodies and self.effects:
+            self.effects.advance(self.tick)
+        self.score = self.scores.get(me, self.score)
+        self.high_score = max(self.high_score, self.score)
+
+    def _remove(self, player_id):
+        body = self.bodies.pop(player_id, None)
+        if body:
+            for cell in body:
+                self._vacate(cell)
+        return body
+
+
+# -- load test -----------------------------------------------------------------------------
+
+async def load_test(bots=200, seconds=10.0, cols=200, rows=200, tick_interval=0.1, seed=0):
+    """Serve an arena to `bots` random-playing TCP clients; returns the measurements"""
+    server = ArenaServer(Arena(cols, rows, seed=seed), tick_interval)
+    host, port = await server.start()
+    received = [0] * bots
+
+    async def bot(index):
+        reader, writer = await asyncio.open_connection(host, port)
+        rng = random.Random(f"{seed}:{index}")
+
+        async def listen():
+            while data := await reader.read(65536):
+                received[index] += len(data)
+
+        listener = asyncio.create_task(listen())
+        try:
+            while True:
+                await asyncio.sleep(tick_interval * rng.uniform(0.5, 1.5))
+                inputs = bytearray()
+                if rng.random() < 0.3:
+                    inputs.append(rng.randrange(len(DIRECTIONS)))
+                inputs.append(RESPAWN)  # ignored while alive
+                writer.write(inputs)
+        finally:
+            listener.cancel()
+            writer.close()
+
+    tasks = [asyncio.create_task(bot(i)) for i in range(bots)]
+    start_tick = server.arena.tick
+    await asyncio.sleep(seconds)
+    ticks = server.arena.tick - start_tick
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await server.stop()
+
+    lateness = sorted(server.lateness)
+    return {
+        'ticks': ticks,
+        'tick rate': ticks / seconds,
+        'lateness p50 ms': lateness[len(lateness) // 2] * 1000,
+        'lateness p99 ms': lateness[int(len(lateness) * 0.99)] * 1000,
+        'lateness max ms': lateness[-1] * 1000,
+        'bytes/s per client': sum(received) / bots / seconds,
+        'bytes per tick per client': sum(received) / bots / max(1, ticks),
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Multiplayer snake server")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help="host a game")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=7777)
+    load = commands.add_parser('loadtest', help="measure the server under bot clients")
+    load.add_argument('--bots', type=int, default=200)
+    load.add_argument('--seconds', type=float, default=10.0)
+    for command in (serve, load):
+        command.add_argument('--cols', type=int, default=None,
+                             help="board width (default 60 to serve, 200 for the load test)")
+        command.add_argument('--rows', type=int, default=None)
+        command.add_argument('--tick', type=float, default=0.15, help="seconds per tick")
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        async def serve_forever():
+            server = ArenaServer(Arena(args.cols or 60, args.rows or 60), args.tick)
+            host, port = await server.start(args.host, args.port)
+            print(f"serving on {host}:{port}")
+            await asyncio.Event().wait()
+        try:
+            asyncio.run(serve_forever())
+        except KeyboardInterrupt:
+            pass
+    else:
+        results = asyncio.run(load_test(args.bots, args.seconds, args.cols or 200,
+                                        args.rows or 200, args.tick))
+        print(f"{args.bots} bots for {args.seconds:.0f} s: {results['ticks']} ticks "
+              f"({results['tick rate']:.2f}/s of {1 / args.tick:.2f}/s)")
+        print(f"tick lateness: p50 {results['lateness p50 ms']:.2f} ms, "
+              f"p99 {results['lateness p99 ms']:.2f} ms, max {results['lateness max ms']:.2f} ms")
+        print(f"bandwidth per client: {results['bytes/s per client']:,.0f} B/s, "
+              f"{results['bytes per tick per client']:,.1f} B per tick")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import math
+
+# Phase steps per half period of abs(sin(...)); 256 keeps every channel
+# within about one level of the exact value
+STEPS = 256
+_SCALE = STEPS / math.pi
+
+# The grid animation repeats every 20 frames
+GRID_PHASES = 20
+
+# Longest body index with its own intensity; later segments share index 7
+INTENSITY_LEVELS = 8
+
+# Snake color channels at full brightness
+NORMAL = (0, 255, 136)
+INVINCIBLE = (255, 0, 128)
+
+
+def _hex(r, g, b):
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def _abs_sin(step):
+    return abs(math.sin(step / _SCALE))
+
+
+def _body_table(base, shimmer):
+    """[intensity level][phase] body colors for one base color"""
+    table = []
+    for level in range(INTENSITY_LEVELS):
+        intensity = max(0.3, 1 - (level * 0.1))
+        table.append([_hex(*(int(c * intensity * (s * 0.2 + 0.8)) for c in base))
+                      for s in shimmer])
+    return table
+
+
+class Palette:
+    """Every animated color and pulse size, built once and looked up by phase.
+
+    The shimmer and pulse effects are abs(sin(rate * frame + offset)), which
+    repeats every pi radians. Each table samples one such half period in
+    STEPS steps, so per-frame lookups cost a multiply and an index: no trig
+    and no string formatting.
+
+    The invincible tables are half the build cost and never needed for the
+    first frame, so they are built by `build_invincible` (called during idle
+    time at startup) or, failing that, on first access.
+    """
+
+    scale = _SCALE  # phase steps per radian
+
+    def __init__(self, width, height, cell_size):
+        self._shimmer = shimmer = [_abs_sin(step) for step in range(STEPS)]
+
+        # Grid: 20 phases of (animation_frame % 20), one color per line position
+        self.grid = []
+        for phase in range(GRID_PHASES):
+            grid_offset = phase * 0.1
+            colors = {}
+            for i in range(0, max(width, height), cell_size):
+                alpha = abs(math.sin((i + grid_offset) * 0.1)) * 0.3 + 0.1
+                colors[i] = _hex(int(22 + alpha * 100), int(83 + alpha * 50), int(126 + alpha * 50))
+            self.grid.append(colors)
+
+        # Head: snake_shimmer drives the normal head
+        self.head = [_hex(*(int(c * (s * 0.3 + 0.7)) for c in NORMAL)) for s in shimmer]
+
+        # Body: [intensity level][phase]
+        self.body = _body_table(NORMAL, shimmer)
+
+        # Food and power-up pulses
+        self.food_colors = []
+        self.food_sizes = []
+        for s in shimmer:
+            food_pulse = s * 0.5 + 0.5
+            self.food_colors.append(f"#{int(255 * food_pulse):02x}4444")
+            self.food_sizes.append(int(food_pulse * 4))
+        self.power_up_sizes = [int((s * 0.4 + 0.6) * 3) for s in shimmer]
+
+        # Power-up symbol bob: plain sin, so a full period of 2 * STEPS
+        self.power_up_bob = [math.sin(step / _SCALE) * 2 for step in range(2 * STEPS)]
+
+    def build_invincible(self):
+        """Build the invincible head (a faster pulse) and body tables"""
+        self.head_invincible = [_hex(*(int(c * s) for c in INVINCIBLE)) for s in self._shimmer]
+        self.body_invincible = _body_table(INVINCIBLE, self._shimmer)
+
+    def __getattr__(self, name):
+        # Only reached while an attribute is missing, so built tables cost nothing
+        if name in ('head_invincible', 'body_invincible'):
+            self.build_invincible()
+            return getattr(self, name)
+        raise AttributeError(name)
+
+    @staticmethod
+    def phase(theta):
+        """Table index for abs(sin(theta))"""
+        return int(theta * _SCALE) % STEPS
+
+    def head_color(self, frame, invincible):
+        if invincible:
+            return self.head_invincible[self.phase(frame * 0.5)]
+        return self.head[self.phase(frame * 0.1)]
+
+    def food(self, frame):
+        """(color, pulse size) of the food"""
+        step = self.phase(frame * 0.2)
+        return self.food_colors[step], self.food_sizes[step]
+
+    def power_up(self, frame):
+        """(pulse size, symbol bob offset) of the power-up"""
+        return (self.power_up_sizes[self.phase(frame * 0.3)],
+                self.power_up_bob[int(frame * 0.2 * _SCALE) % (2 * STEPS)])
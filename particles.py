@@ -0,0 +1,204 @@
+from array import array
+
+
+class _AgeOrder:
+    """Live slots of a pool, oldest first, for evicting in O(1).
+
+    A ring of slot indexes in emit order. A slot that dies leaves a hole
+    (-1) in its place; the holes are skipped when they reach the front,
+    and squeezed out in one pass when the ring fills, which happens at
+    most once per `capacity` emits, so every operation is O(1) amortized.
+    """
+
+    def __init__(self, capacity):
+        self._ring = array('i', bytes(4 * 2 * capacity))
+        self._entry = array('q', bytes(8 * capacity))  # slot -> its position in the ring
+        self._head = self._tail = 0  # positions, counted from the last clear
+
+    def clear(self):
+        self._head = self._tail = 0
+
+    def push(self, slot):
+        """Record `slot` as the newest"""
+        ring = self._ring
+        if self._tail - self._head == len(ring):
+            self._compact()
+        self._ring[self._tail % len(ring)] = slot
+        self._entry[slot] = self._tail
+        self._tail += 1
+
+    def pop(self):
+        """Take the oldest live slot out of the order"""
+        ring = self._ring
+        while ring[self._head % len(ring)] < 0:
+            self._head += 1
+        slot = ring[self._head % len(ring)]
+        self._head += 1
+        return slot
+
+    def remove(self, slot):
+        self._ring[self._entry[slot] % len(self._ring)] = -1
+
+    def moved(self, src, dst):
+        """The particle in slot `src` now lives in slot `dst`"""
+        position = self._entry[src]
+        self._ring[position % len(self._ring)] = dst
+        self._entry[dst] = position
+
+    def _compact(self):
+        ring = self._ring
+        live = [slot for slot in (ring[i % len(ring)] for i in range(self._head, self._tail))
+                if slot >= 0]
+        self._head, self._tail = 0, 0
+        for slot in live:
+            ring[self._tail] = slot
+            self._entry[slot] = self._tail
+            self._tail += 1
+
+
+class ParticlePool:
+    """Fixed-capacity particle storage as parallel arrays (struct of arrays).
+
+    Live particles occupy slots [0, count). Dead particles are swap-removed
+    with the last live one, and emitting into a full pool evicts the oldest
+    particle, so neither updates nor emits ever grow the pool.
+    """
+
+    def __init__(self, capacity=256, gravity=0.2, shrink=0.98):
+        self.capacity = capacity
+        self.gravity = gravity
+        self.shrink = shrink
+        self.count = 0
+        self._age = _AgeOrder(capacity)  # to find the oldest particle
+
+        self.x = array('d', bytes(8 * capacity))
+        self.y = array('d', bytes(8 * capacity))
+        self.vx = array('d', bytes(8 * capacity))
+        self.vy = array('d', bytes(8 * capacity))
+        self.size = array('d', bytes(8 * capacity))
+        self.life = array('i', bytes(4 * capacity))
+        self.color = [None] * capacity
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+        self._age.clear()
+
+    def _slot(self):
+        if self.count < self.capacity:
+            self.count += 1
+            slot = self.count - 1
+        else:
+            slot = self._age.pop()  # Full: reuse the slot of the oldest particle
+        self._age.push(slot)
+        return slot
+
+    def emit(self, x, y, vx, vy, life, color, size):
+        i = self._slot()
+        self.x[i] = x
+        self.y[i] = y
+        self.vx[i] = vx
+        self.vy[i] = vy
+        self.life[i] = life
+        self.color[i] = color
+        self.size[i] = size
+
+    def _move(self, src, dst):
+        self.x[dst] = self.x[src]
+        self.y[dst] = self.y[src]
+        self.vx[dst] = self.vx[src]
+        self.vy[dst] = self.vy[src]
+        self.life[dst] = self.life[src]
+        self.color[dst] = self.color[src]
+        self.size[dst] = self.size[src]
+        self._age.moved(src, dst)
+
+    def update(self):
+        """Advance every live particle one animation frame and drop dead ones"""
+        x, y, vx, vy, life, size = self.x, self.y, self.vx, self.vy, self.life, self.size
+        gravity, shrink = self.gravity, self.shrink
+        i = 0
+        while i < self.count:
+            x[i] += vx[i]
+            y[i] += vy[i]
+            vy[i] += gravity
+            life[i] -= 1
+            size[i] *= shrink
+
+            if life[i] <= 0:
+                # Swap-remove; the moved particle still needs this frame's update
+                self._age.remove(i)
+                self.count -= 1
+                last = self.count
+                if i != last:
+                    self._move(last, i)
+                    continue
+            i += 1
+
+
+class TextPool:
+    """Fixed-capacity storage for floating text, laid out like ParticlePool"""
+
+    def __init__(self, capacity=32):
+        self.capacity = capacity
+        self.count = 0
+        self._age = _AgeOrder(capacity)
+
+        self.x = array('d', bytes(8 * capacity))
+        self.y = array('d', bytes(8 * capacity))
+        self.vy = array('d', bytes(8 * capacity))
+        self.life = array('i', bytes(4 * capacity))
+        self.size = array('i', bytes(4 * capacity))
+        self.text = [None] * capacity
+        self.color = [None] * capacity
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+        self._age.clear()
+
+    def _slot(self):
+        if self.count < self.capacity:
+            self.count += 1
+            slot = self.count - 1
+        else:
+            slot = self._age.pop()
+        self._age.push(slot)
+        return slot
+
+    def emit(self, text, x, y, vy, life, color, size):
+        i = self._slot()
+        self.text[i] = text
+        self.x[i] = x
+        self.y[i] = y
+        self.vy[i] = vy
+        self.life[i] = life
+        self.color[i] = color
+        self.size[i] = size
+
+    def update(self):
+        """Float every live text up one frame and drop expired ones"""
+        i = 0
+        while i < self.count:
+            self.y[i] += self.vy[i]
+            self.life[i] -= 1
+
+            if self.life[i] <= 0:
+                self._age.remove(i)
+                self.count -= 1
+                last = self.count
+                if i != last:
+                    self.text[i] = self.text[last]
+                    self.x[i] = self.x[last]
+                    self.y[i] = self.y[last]
+                    self.vy[i] = self.vy[last]
+                    self.life[i] = self.life[last]
+                    self.color[i] = self.color[last]
+                    self.size[i] = self.size[last]
+                    self._age.moved(last, i)
+                    continue
+            i += 1
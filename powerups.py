@@ -0,0 +1,194 @@
+"""Power-up types as data, and the timers of the effects they give.
+
+Each type says how likely it is to spawn, what picking it up is worth, how
+long its effect lasts, what the effect does to scoring, speed and
+collisions, and how it looks. The rules (engine.py, arena.py,
+batch_env.py) and the view read these fields instead of testing names, so
+a new kind of power-up is one `POWER_UPS.register(PowerUp(...))` call.
+"""
+
+
+class PowerUp:
+    """One kind of power-up.
+
+    `duration` is in ticks; 0 means the power-up acts once, when picked up.
+    While the effect lasts, food is worth `score_multiplier` times as much,
+    ticks take `tick_scale` times as long in the Tk game, and an
+    `invulnerable` snake wraps around the edges and passes through bodies.
+    Picking up a `stacks` power-up while its effect lasts adds `duration`
+    to the time left; otherwise the timer restarts.
+    """
+
+    __slots__ = ('name', 'weight', 'duration', 'points', 'score_multiplier', 'tick_scale',
+                 'invulnerable', 'stacks', 'color', 'symbol', 'label', 'status', 'particles')
+
+    def __init__(self, name, weight=1, duration=0, points=0, score_multiplier=1, tick_scale=1.0,
+                 invulnerable=False, stacks=False, color="#ffffff", symbol="?", label=None,
+                 status=None, particles=12):
+        self.name = name
+        self.weight = weight
+        self.duration = duration
+        self.points = points  # bonus on pickup
+        self.score_multiplier = score_multiplier
+        self.tick_scale = tick_scale
+        self.invulnerable = invulnerable
+        self.stacks = stacks
+        self.color = color
+        self.symbol = symbol
+        self.label = label or name.upper()  # floating text on pickup
+        self.status = status  # status bar text while the effect lasts
+        self.particles = particles  # burst size on pickup
+
+
+class PowerUpRegistry:
+    """Power-up types by name, in registration order, with weighted spawning.
+
+    `choose` draws a type by weight in O(1) from an alias table (Vose's
+    method) rebuilt on every registration: one uniform column, then a
+    biased coin between the column's own type and its alias. Columns that
+    are entirely their own type skip the coin, so equal weights cost one
+    `rng.randrange` call, the same draws as `rng.choice(names)`, and
+    seeded games and replays stay the same.
+    """
+
+    def __init__(self, power_ups=()):
+        self.types = []
+        self.names = []  # index -> name, the order used in compact encodings
+        self._by_name = {}
+        self.probability = []  # per column: chance of keeping the column's own type
+        self.alias = []  # per column: the type used otherwise
+        for power_up in power_ups:
+            self.register(power_up)
+
+    def register(self, power_up):
+        """Add a type, or replace the one with the same name in place"""
+        if power_up.weight < 0:
+            raise ValueError(f"power-up weight must not be negative, got {power_up.weight}")
+        if power_up.name in self._by_name:
+            self.types[self.names.index(power_up.name)] = power_up
+        else:
+            self.types.append(power_up)
+            self.names.append(power_up.name)
+        self._by_name[power_up.name] = power_up
+        self._build_alias()
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    def __len__(self):
+        return len(self.types)
+
+    def __iter__(self):
+        return iter(self.types)
+
+    def index(self, name):
+        return self.names.index(name)
+
+    def _build_alias(self):
+        count = len(self.types)
+        total = sum(power_up.weight for power_up in self.types)
+        if total <= 0:
+            raise ValueError("at least one power-up needs a positive weight")
+        scaled = [power_up.weight * count / total for power_up in self.types]
+        probability = [1.0] * count
+        alias = list(range(count))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probability[less] = scaled[less]
+            alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left is 1 up to rounding: those columns keep their own type
+        self.probability = probability
+        self.alias = alias
+
+    def choose(self, rng):
+        """Name of a type drawn by weight from `rng` (a random.Random)"""
+        column = rng.randrange(len(self.names))
+        if self.probability[column] < 1.0 and rng.random() >= self.probability[column]:
+            column = self.alias[column]
+        return self.names[column]
+
+
+POWER_UPS = PowerUpRegistry([
+    PowerUp('invincible', duration=50, invulnerable=True, color="#ff00ff", symbol="🛡️",
+            label="INVINCIBLE!", status="🛡️ INVINCIBLE!"),
+    PowerUp('speed', duration=50, score_multiplier=2, tick_scale=0.5, color="#ffff00",
+            symbol="⚡", label="SPEED BOOST!", status="⚡ SPEED BOOST!"),
+    PowerUp('double_points', points=50, color="#00ffff", symbol="💎", label="+50 BONUS!",
+            particles=15),
+])
+
+
+class EffectWheel:
+    """Effect timers on a hashed timing wheel.
+
+    Each timer sits in the slot for the tick it expires on, so `advance`
+    only looks at one slot per tick: its cost depends on how many timers
+    end then (plus the rare timer a whole turn of the wheel further out),
+    not on how many are running. Restarting or cancelling a timer leaves
+    the old slot entry behind to be skipped, which keeps both O(1).
+
+    Keys are anything hashable: a power-up name for one snake, or
+    (player id, name) for many. An effect lasts while its key is in
+    `expires`; call `advance` with every tick number in turn.
+    """
+
+    def __init__(self, slots=64):
+        self._slots = [[] for _ in range(slots)]
+        self.expires = {}  # key -> tick at the end of which the effect stops
+
+    def __contains__(self, key):
+        return key in self.expires
+
+    def __len__(self):
+        return len(self.expires)
+
+    def start(self, key, power_up, tick):
+        """Start (or restart, or for stacking types extend) an effect picked up on `tick`.
+
+        Like a counter set to `duration` and decremented at the end of each
+        tick, including this one: the effect ends on tick + duration - 1.
+        """
+        current = self.expires.get(key)
+        if current is not None and power_up.stacks:
+            self.schedule(key, current + power_up.duration)
+        else:
+            self.schedule(key, tick + power_up.duration - 1)
+
+    def schedule(self, key, expires):
+        self.expires[key] = expires
+        self._slots[expires % len(self._slots)].append((key, expires))
+
+    def remaining(self, key, tick):
+        """Ticks left after `tick`, 0 if the effect is not running"""
+        expires = self.expires.get(key)
+        return 0 if expires is None else max(0, expires - tick)
+
+    def cancel(self, key):
+        self.expires.pop(key, None)
+
+    def clear(self):
+        self.expires.clear()
+        for slot in self._slots:
+            slot.clear()
+
+    def advance(self, tick):
+        """End the effects that expire on `tick`; returns their keys"""
+        index = tick % len(self._slots)
+        slot = self._slots[index]
+        if not slot:
+            return []
+        expires = self.expires
+        ended = []
+        later = []
+        for key, when in slot:
+            if when > tick:
+                later.append((key, when))  # a turn of the wheel or more away
+            elif expires.get(key) == when:
+                del expires[key]
+                ended.append(key)
+        self._slots[index] = later
+        return ended
@@ -0,0 +1,127 @@
+import time
+from array import array
+
+
+class _Ring:
+    """Fixed-size ring buffer of (start, duration) pairs in nanoseconds"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.starts = array('q', bytes(8 * capacity))
+        self.durations = array('q', bytes(8 * capacity))
+        self.count = 0  # total ever recorded; the newest is at (count - 1) % capacity
+
+    def add(self, start, duration):
+        i = self.count % self.capacity
+        self.starts[i] = start
+        self.durations[i] = duration
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def ordered(self):
+        """Entries oldest first"""
+        n = len(self)
+        first = self.count - n
+        return [(self.starts[i % self.capacity], self.durations[i % self.capacity])
+                for i in range(first, self.count)]
+
+
+class Profiler:
+    """Per-call timings of the hot paths plus a few gauges, in ring buffers.
+
+    Methods are timed by replacing them on one instance with timing wrappers
+    (`attach`) and putting the originals back (`detach`). While detached the
+    game runs its plain methods, so a disabled profiler costs nothing.
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.enabled = False
+        self.timings = {}
+        self.gauges = {}
+        self._gauge_times = _Ring(capacity)
+        self._attached = []
+        self._origin = time.perf_counter_ns()
+
+    def _ring(self, name):
+        ring = self.timings.get(name)
+        if ring is None:
+            ring = self.timings[name] = _Ring(self.capacity)
+        return ring
+
+    def _wrap(self, name, func):
+        ring = self._ring(name)
+        clock = time.perf_counter_ns
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                ring.add(start, clock() - start)
+        return timed
+
+    def attach(self, obj, names):
+        """Start timing the named methods of `obj`"""
+        for name in names:
+            setattr(obj, name, self._wrap(name, getattr(obj, name)))
+            self._attached.append((obj, name))
+        self.enabled = True
+
+    def detach(self):
+        """Restore every timed method to the class implementation"""
+        for obj, name in self._attached:
+            delattr(obj, name)
+        self._attached = []
+        self.enabled = False
+
+    def sample(self, **values):
+        """Record gauge values (item counts, lengths, ...) at the current time"""
+        self._gauge_times.add(time.perf_counter_ns(), 0)
+        for name, value in values.items():
+            ring = self.gauges.get(name)
+            if ring is None:
+                ring = self.gauges[name] = array('q', bytes(8 * self.capacity))
+            ring[(self._gauge_times.count - 1) % self.capacity] = value
+
+    def percentiles(self, name, *points):
+        """Durations in milliseconds at the given percentiles (0-100) for one timed method"""
+        ring = self.timings.get(name)
+        if not ring:
+            return [0.0 for _ in points]
+        durations = sorted(ring.durations[:len(ring)])
+        last = len(durations) - 1
+        return [durations[min(last, int(p / 100 * len(durations)))] / 1e6 for p in points]
+
+    def rate(self, name, window=60):
+        """Calls per second of a timed method over its last `window` calls"""
+        ring = self.timings.get(name)
+        if not ring or len(ring) < 2:
+            return 0.0
+        calls = min(window, len(ring))
+        newest = ring.starts[(ring.count - 1) % ring.capacity]
+        oldest = ring.starts[(ring.count - calls) % ring.capacity]
+        span = newest - oldest
+        return (calls - 1) * 1e9 / span if span else 0.0
+
+    def dump_trace(self, path):
+        """Write the buffered data as Chrome trace-event JSON (chrome://tracing, Perfetto)"""
+        import json
+
+        events = []
+        for name, ring in self.timings.items():
+            for start, duration in ring.ordered():
+                events.append({'name': name, 'ph': 'X', 'pid': 1, 'tid': 1,
+                               'ts': (start - self._origin) / 1000, 'dur': duration / 1000})
+        times = self._gauge_times
+        for index in range(times.count - len(times), times.count):
+            slot = index % self.capacity
+            events.append({'name': 'gauges', 'ph': 'C', 'pid': 1,
+                           'ts': (times.starts[slot] - self._origin) / 1000,
+                           'args': {name: ring[slot] for name, ring in self.gauges.items()}})
+        events.sort(key=lambda event: event['ts'])
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return path
@@ -0,0 +1,572 @@
+from collections import deque
+from itertools import islice
+
+from palette import GRID_PHASES, INTENSITY_LEVELS, STEPS, Palette
+from powerups import POWER_UPS
+
+# Drawing order, bottom to top. Every pooled item is slotted into its layer
+# when it is created, so items can be added lazily without breaking z-order.
+LAYERS = ('grid', 'body', 'head', 'food', 'power_up', 'particles', 'text', 'overlay')
+
+BACKGROUND = "#0f3460"
+
+# The body shimmer, abs(sin(frame * 0.1 + i * 0.3)) for segment i, repeats
+# about every 10.5 segments. Rounded to 10, segments 10 apart always share a
+# color, so past the head's gradient each segment joins one of ten tags
+# when it is placed and a whole bucket is recolored with one call.
+SHIMMER_PERIOD = 10
+_SHIMMER_TAGS = tuple(f'shimmer{bucket}' for bucket in range(SHIMMER_PERIOD))
+
+
+class CanvasRenderer:
+    """Retained-mode renderer: canvas items are created once and updated in place"""
+
+    def __init__(self, canvas, width, height, cell_size):
+        self.canvas = canvas
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+        self.palette = Palette(width, height, cell_size)
+
+        # Last values pushed to Tk, per item, so unchanged items are skipped
+        self._coords = {}
+        self._options = {}
+
+        # One hidden anchor item per layer marks where that layer begins
+        self._anchors = {}
+        for layer in LAYERS:
+            self._anchors[layer] = canvas.create_line(0, 0, 0, 0, state='hidden')
+
+        self._grid_images = [None] * GRID_PHASES
+        self._grid = self._new('grid', 'image', anchor='nw')
+
+        # Snake body: one rectangle per segment, kept aligned with snake[1:].
+        # Segment serials count up from the tail as the snake moves, so a
+        # segment keeps its shimmer bucket (serial % SHIMMER_PERIOD) for life
+        self._body_items = deque()
+        self._spare_body = []
+        self._neck_serial = 0
+        self._bucket_fills = [None] * SHIMMER_PERIOD
+        self._synced = None  # (engine, tick) the body items were last aligned with
+        self._body_drawn = None  # what the last body pass drew, to skip repeats
+
+        self._tail_ghost = self._new('body', 'rectangle', outline="#ffffff", width=1)
+        self._head = self._new('head', 'rectangle', outline="white", width=2)
+        self._eyes = [self._new('head', 'oval', fill="white"),
+                      self._new('head', 'oval', fill="white"),
+                      self._new('head', 'oval', fill="black"),
+                      self._new('head', 'oval', fill="black")]
+        self._blink = [self._new('head', 'line', fill="white", width=2),
+                       self._new('head', 'line', fill="white", width=2)]
+
+        self._food = self._new('food', 'oval', outline="#ffffff", width=2)
+        self._power_up = self._new('power_up', 'rectangle', outline="white", width=2)
+        self._power_up_symbol = self._new('power_up', 'text', font=("Arial", 12))
+
+        self._particles = []
+        self._particles_shown = 0
+        self._texts = []
+        self._texts_shown = 0
+
+        self._game_over = [
+            self._new('overlay', 'text', font=("Arial", 36, "bold")),
+            self._new('overlay', 'text', font=("Arial", 20), fill="#ffffff"),
+            self._new('overlay', 'text', text="Press 'R' or click 'New Game' to restart",
+                      font=("Arial", 14), fill="#00ccff"),
+        ]
+        self._stats = self._new('overlay', 'text', anchor='nw', font=("Courier", 10),
+                                fill="#ffffff")
+        self._place_overlay(0, 0)
+
+    def _place_overlay(self, left, top):
+        """Lay out the overlay text in the view whose top-left corner is given"""
+        cx, cy = left + self.width // 2, top + self.height // 2
+        self._place(self._stats, left + 6, top + 6)
+        self._place(self._game_over[0], cx, cy)
+        self._place(self._game_over[1], cx, cy + 50)
+        self._place(self._game_over[2], cx, cy + 80)
+
+    # -- low level item helpers ------------------------------------------------
+
+    def _new(self, layer, kind, **options):
+        """Create a hidden item of the given kind and slot it into its layer"""
+        create = getattr(self.canvas, 'create_' + kind)
+        coords = (0, 0) if kind in ('text', 'image') else (0, 0, 0, 0)
+        item = create(*coords, state='hidden', **options)
+        self.canvas.tag_raise(item, self._anchors[layer])
+        self._coords[item] = coords
+        options['state'] = 'hidden'
+        self._options[item] = options
+        return item
+
+    def _place(self, item, *coords):
+        """Move an item, touching Tk only if its coordinates changed"""
+        if self._coords[item] != coords:
+            self.canvas.coords(item, *coords)
+            self._coords[item] = coords
+
+    def _config(self, item, **options):
+        """Reconfigure an item, touching Tk only for options that changed"""
+        cached = self._options[item]
+        changed = {}
+        for key, value in options.items():
+            if cached.get(key) != value:
+                changed[key] = value
+        if changed:
+            self.canvas.itemconfig(item, **changed)
+            cached.update(changed)
+
+    def _show(self, item):
+        self._config(item, state='normal')
+
+    def _hide(self, item):
+        self._config(item, state='hidden')
+
+    # -- grid ------------------------------------------------------------------
+
+    def _grid_image(self, phase):
+        """The grid for one animation phase, rendered into an image on first use"""
+        image = self._grid_images[phase]
+        if image is None:
+            import tkinter as tk  # not at module level, so importing the renderer stays cheap
+
+            colors = self.palette.grid[phase]
+            image = tk.PhotoImage(master=self.canvas, width=self.width, height=self.height)
+            image.put(BACKGROUND, to=(0, 0, self.width, self.height))
+            for i in range(0, self.width, self.cell_size):
+                image.put(colors[i], to=(i, 0, i + 1, self.height))
+            for i in range(0, self.height, self.cell_size):
+                image.put(colors[i], to=(0, i, self.width, i + 1))
+            self._grid_images[phase] = image
+        return image
+
+    def prebuild_grid(self):
+        """Render all grid phases now instead of during the first frames"""
+        for phase in range(GRID_PHASES):
+            self._grid_image(phase)
+
+    def deferred_setup(self):
+        """Small jobs that build what the first frame does not need, for idle time"""
+        jobs = [self.palette.build_invincible]
+        jobs.extend(lambda phase=phase: self._grid_image(phase) for phase in range(GRID_PHASES))
+        return jobs
+
+    def _draw_grid(self, game):
+        # The grid is one image item; animating it is a single image swap
+        self._config(self._grid, image=self._grid_image(game.animation_frame % GRID_PHASES),
+                     state='normal')
+
+    # -- snake -----------------------------------------------------------------
+
+    def _cell_box(self, cell):
+        x1, y1 = cell[0] * self.cell_size, cell[1] * self.cell_size
+        return x1, y1, x1 + self.cell_size, y1 + self.cell_size
+
+    def _take_body_item(self):
+        if self._spare_body:
+            return self._spare_body.pop()
+        return self._new('body', 'rectangle', outline="#ffffff", width=1)
+
+    def _untag(self, item):
+        """Take an item out of its shimmer bucket so it can be colored on its own"""
+        if self._options[item].get('tags'):
+            self.canvas.itemconfig(item, tags=())
+            self._options[item]['tags'] = ()
+            self._options[item].pop('fill', None)  # the bucket's colors were never cached
+
+    def _sync_body(self, engine, tagging):
+        """Align the body items with snake[1:], moving as few items as possible.
+
+        A tick that moved or grew the snake moves one item. Anything else
+        (a new game, a rewind, a load) places every item again. Items that
+        reach the end of the head's gradient are added to `tagging` as
+        (item, serial) to join their shimmer bucket.
+        """
+        snake = engine.snake
+        length = len(snake) - 1
+        items = self._body_items
+        last_level = INTENSITY_LEVELS - 1
+        synced = self._synced
+        if synced is not None and synced[0] is engine and not engine.dirty_all:
+            if engine.tick == synced[1]:
+                return
+            if engine.tick == synced[1] + 1 and length and (
+                    length == len(items) if engine.vacated is not None else length == len(items) + 1):
+                if engine.vacated is not None:
+                    # Plain move: the old tail item becomes the new neck
+                    items.rotate(1)
+                    self._untag(items[0])
+                else:
+                    # Growth: one new item at the neck, everything else stays put
+                    items.appendleft(self._take_body_item())
+                self._neck_serial += 1
+                self._place(items[0], *self._cell_box(snake[1]))
+                if length >= last_level:
+                    tagging.append((items[last_level - 1], self._neck_serial - last_level + 1))
+                self._synced = (engine, engine.tick)
+                return
+
+        while len(items) < length:
+            items.append(self._take_body_item())
+        while len(items) > length:
+            item = items.pop()
+            self._untag(item)
+            self._hide(item)
+            self._spare_body.append(item)
+        for position, (item, cell) in enumerate(zip(items, islice(snake, 1, None)), 1):
+            self._place(item, *self._cell_box(cell))
+            if position < last_level:
+                self._untag(item)
+            else:
+                tagging.append((item, self._neck_serial - position + 1))
+        self._synced = (engine, engine.tick)
+        engine.dirty_all = False
+
+    def _draw_body(self, game):
+        """Place and color the body items; skipped while neither tick nor animation moved"""
+        engine = game.engine
+        palette = self.palette
+        frame = game.animation_frame
+        table = palette.body_invincible if game.invincible > 0 else palette.body
+        drawn = (engine, engine.tick, len(engine.snake), frame, table)
+        if drawn == self._body_drawn and not engine.dirty_all:
+            return
+        self._body_drawn = drawn
+
+        tagging = []
+        self._sync_body(engine, tagging)
+        items = self._body_items
+
+        # Body shimmer: abs(sin(frame * 0.1 + i * 0.3)), looked up by phase.
+        # Each bucket past the gradient is one Tk call, changed or not
+        base = frame * 0.1 * palette.scale
+        step = 0.3 * palette.scale
+        last_level = INTENSITY_LEVELS - 1
+        if len(items) >= last_level:
+            colors = table[last_level]
+            fills = self._bucket_fills
+            for bucket in range(SHIMMER_PERIOD):
+                position = (self._neck_serial - bucket + 1) % SHIMMER_PERIOD
+                fill = colors[int(base + position * STEPS / SHIMMER_PERIOD) % STEPS]
+                if fills[bucket] != fill:
+                    self.canvas.itemconfig(_SHIMMER_TAGS[bucket], fill=fill)
+                    fills[bucket] = fill
+            for item, serial in tagging:
+                bucket = serial % SHIMMER_PERIOD
+                self.canvas.itemconfig(item, tags=(_SHIMMER_TAGS[bucket],),
+                                       fill=fills[bucket], state='normal')
+                options = self._options[item]
+                options['tags'] = (_SHIMMER_TAGS[bucket],)
+                options['state'] = 'normal'
+                options.pop('fill', None)
+
+        # The head's gradient: the first few segments are colored one by one
+        for i in range(1, min(len(items) + 1, last_level)):
+            self._config(items[i - 1], fill=table[i][int(base + i * step) % STEPS], state='normal')
+
+    def _segment_fill(self, position):
+        """Current color of the body segment at `position` (1 is the neck)"""
+        last_level = INTENSITY_LEVELS - 1
+        if position >= last_level:
+            return self._bucket_fills[(self._neck_serial - position + 1) % SHIMMER_PERIOD]
+        return self._options[self._body_items[position - 1]]['fill']
+
+    def _lerp_box(self, start, end, alpha):
+        """Cell box slid from `start` toward the adjacent cell `end`"""
+        if start is None or alpha >= 1 or abs(end[0] - start[0]) + abs(end[1] - start[1]) != 1:
+            return self._cell_box(end)  # nothing to slide from, or wrapped around
+        x = (start[0] + (end[0] - start[0]) * alpha) * self.cell_size
+        y = (start[1] + (end[1] - start[1]) * alpha) * self.cell_size
+        return x, y, x + self.cell_size, y + self.cell_size
+
+    def _draw_snake(self, game, alpha):
+        self._draw_body(game)
+
+        snake = game.snake
+        length = len(snake) - 1
+        vacated = game.engine.vacated
+        previous_head = snake[1] if length else vacated
+
+        # Between ticks the head slides out of the neck cell, and a ghost of
+        # the vacated tail cell slides into the current tail
+        if length and vacated is not None and alpha < 1:
+            self._place(self._tail_ghost, *self._lerp_box(vacated, snake[-1], alpha))
+            self._config(self._tail_ghost, fill=self._segment_fill(length))
+            self._show(self._tail_ghost)
+        else:
+            self._hide(self._tail_ghost)
+
+        self._draw_head(game, self._lerp_box(previous_head, snake[0], alpha))
+
+    def _draw_head(self, game, box):
+        # Head with animated color
+        x1, y1, x2, y2 = box
+        color = self.palette.head_color(game.animation_frame, game.invincible > 0)
+        self._place(self._head, x1, y1, x2, y2)
+        self._config(self._head, fill=color, state='normal')
+
+        # Animated eyes
+        eye_blink = (game.animation_frame % 60) > 55
+        if not eye_blink:
+            self._place(self._eyes[0], x1+5, y1+5, x1+8, y1+8)
+            self._place(self._eyes[1], x1+12, y1+5, x1+15, y1+8)
+            self._place(self._eyes[2], x1+6, y1+6, x1+7, y1+7)
+            self._place(self._eyes[3], x1+13, y1+6, x1+14, y1+7)
+            for item in self._eyes:
+                self._show(item)
+            for item in self._blink:
+                self._hide(item)
+        else:
+            self._place(self._blink[0], x1+5, y1+6, x1+8, y1+6)
+            self._place(self._blink[1], x1+12, y1+6, x1+15, y1+6)
+            for item in self._blink:
+                self._show(item)
+            for item in self._eyes:
+                self._hide(item)
+
+    # -- food and power-ups ----------------------------------------------------
+
+    def _draw_food(self, game):
+        if game.food is None:
+            self._hide(self._food)
+            return
+
+        fx1, fy1, fx2, fy2 = self._cell_box(game.food)
+
+        # Pulsing food
+        food_color, pulse_size = self.palette.food(game.animation_frame)
+        self._place(self._food, fx1+2-pulse_size, fy1+2-pulse_size,
+                    fx2-2+pulse_size, fy2-2+pulse_size)
+        self._config(self._food, fill=food_color, state='normal')
+
+    def _draw_power_up(self, game):
+        if not game.power_up:
+            self._hide(self._power_up)
+            self._hide(self._power_up_symbol)
+            return
+
+        px, py, ptype = game.power_up
+        px1, py1, px2, py2 = self._cell_box((px, py))
+
+        # Pulsing power-up with a bobbing symbol
+        pulse_size, rotation_offset = self.palette.power_up(game.animation_frame)
+        self._place(self._power_up, px1-pulse_size, py1-pulse_size,
+                    px2+pulse_size, py2+pulse_size)
+        self._config(self._power_up, fill=POWER_UPS[ptype].color, state='normal')
+
+        self._place(self._power_up_symbol, px1 + self.cell_size//2,
+                    py1 + self.cell_size//2 + rotation_offset)
+        self._config(self._power_up_symbol, text=POWER_UPS[ptype].symbol, state='normal')
+
+    # -- effects ---------------------------------------------------------------
+
+    def _draw_particles(self, game):
+        pool = game.particles
+        items = self._particles
+        while len(items) < pool.count:
+            items.append(self._new('particles', 'oval', outline=""))
+
+        # Particles move every frame, so move them all in one Tcl round trip
+        # instead of one coords call each
+        if pool.count:
+            path = str(self.canvas)
+            x, y, size = pool.x, pool.y, pool.size
+            script = []
+            for i in range(pool.count):
+                s = size[i]
+                script.append(f"{path} coords {items[i]} {x[i]-s} {y[i]-s} {x[i]+s} {y[i]+s}")
+            self.canvas.tk.eval("\n".join(script))
+
+        for i in range(pool.count):
+            self._config(items[i], fill=pool.color[i], state='normal')
+        for item in items[pool.count:self._particles_shown]:
+            self._hide(item)
+        self._particles_shown = pool.count
+
+    def _draw_texts(self, game):
+        pool = game.texts
+        items = self._texts
+        while len(items) < pool.count:
+            items.append(self._new('text', 'text'))
+
+        for i in range(pool.count):
+            alpha = pool.life[i] / 30.0
+            size = int(pool.size[i] * alpha)
+            self._place(items[i], pool.x[i], pool.y[i])
+            self._config(items[i], text=pool.text[i], font=("Arial", size, "bold"),
+                         fill=pool.color[i], state='normal')
+        for item in items[pool.count:self._texts_shown]:
+            self._hide(item)
+        self._texts_shown = pool.count
+
+    def _draw_game_over(self, game):
+        if game.game_over:
+            if game.won:
+                self._config(self._game_over[0], text="🏆 YOU WIN! 🏆", fill="#00ff88")
+            else:
+                self._config(self._game_over[0], text="💀 GAME OVER! 💀", fill="#ff4444")
+            self._config(self._game_over[1], text=f"Final Score: {game.score}")
+            for item in self._game_over:
+                self._show(item)
+        else:
+            for item in self._game_over:
+                self._hide(item)
+
+    def item_count(self):
+        """Canvas items this renderer has created, hidden ones included"""
+        return len(self._anchors) + len(self._coords)
+
+    def draw_stats(self, text):
+        """Show profiler text in the top-left corner of the view, or hide it for None"""
+        if text is None:
+            self._hide(self._stats)
+        else:
+            self._config(self._stats, text=text, state='normal')
+
+    def render(self, game, alpha=1.0):
+        """Bring the canvas in line with the current game state.
+
+        `alpha` is how far the next tick has progressed (0..1); the snake's
+        ends are interpolated by it. Pass 1.0 to draw the exact tick state.
+        """
+        self._draw_grid(game)
+        self._draw_snake(game, alpha)
+        self._draw_food(game)
+        self._draw_power_up(game)
+        self._draw_particles(game)
+        self._draw_texts(game)
+        self._draw_game_over(game)
+
+
+def _outside(a, b):
+    """Cells of rectangle `a` not in rectangle `b`, as at most four rectangles.
+
+    Rectangles are (x0, y0, x1, y1) in cells, with exclusive upper bounds.
+    """
+    ax0, ay0, ax1, ay1 = a
+    bx0, by0, bx1, by1 = b
+    parts = []
+    # Columns of `a` left and right of `b`
+    if bx0 > ax0:
+        parts.append((ax0, ay0, min(ax1, bx0), ay1))
+    if bx1 < ax1:
+        parts.append((max(ax0, bx1), ay0, ax1, ay1))
+    # Rows above and below `b` within the shared columns
+    cx0, cx1 = max(ax0, bx0), min(ax1, bx1)
+    if cx0 < cx1:
+        if by0 > ay0:
+            parts.append((cx0, ay0, cx1, min(ay1, by0)))
+        if by1 < ay1:
+            parts.append((cx0, max(ay0, by1), cx1, ay1))
+    return parts
+
+
+class LargeBoardRenderer(CanvasRenderer):
+    """Renderer for boards larger than the window, with a camera on the head.
+
+    Items use board coordinates and the canvas is scrolled to the camera.
+    Only occupied cells inside the view have body items. Moving the camera
+    touches just the strip of cells that enters or leaves the view. Between
+    camera moves, only the cells the engine marks dirty are redrawn: the new
+    head, the vacated tail, food and power-up. Frame cost therefore depends
+    on the view size, not the board size.
+
+    The body is drawn in a single shimmering color: per-segment shading would
+    need the index of every visible segment, which costs O(length).
+    """
+
+    def __init__(self, canvas, engine, view_cols, view_rows, cell_size):
+        super().__init__(canvas, view_cols * cell_size, view_rows * cell_size, cell_size)
+        self.engine = engine
+        self.view_cols = view_cols
+        self.view_rows = view_rows
+        engine.dirty = []  # turn on dirty-cell tracking in the engine
+
+        canvas.configure(scrollregion=(0, 0, engine.cols * cell_size, engine.rows * cell_size))
+        self._cells = {}  # visible occupied cell -> rectangle item
+        self._spare_cells = []
+        self._view = None  # (x0, y0, x1, y1) in cells
+        self._body_fill = None
+
+    def _camera(self, head):
+        """Visible rectangle centered on the head, clamped to the board"""
+        x0 = min(max(head[0] - self.view_cols // 2, 0), self.engine.cols - self.view_cols)
+        y0 = min(max(head[1] - self.view_rows // 2, 0), self.engine.rows - self.view_rows)
+        return (x0, y0, x0 + self.view_cols, y0 + self.view_rows)
+
+    def _sync_cell(self, cell):
+        """Give an occupied cell an item and take it away from a free one"""
+        item = self._cells.get(cell)
+        if self.engine.is_occupied(cell):
+            if item is None:
+                if self._spare_cells:
+                    item = self._spare_cells.pop()
+                else:
+                    item = self._new('body', 'rectangle', outline="#ffffff", width=1,
+                                     fill=self._body_fill, tags=('cell',))
+                self._place(item, *self._cell_box(cell))
+                self._show(item)
+                self._cells[cell] = item
+        elif item is not None:
+            self._release(cell)
+
+    def _release(self, cell):
+        item = self._cells.pop(cell)
+        self._hide(item)
+        self._spare_cells.append(item)
+
+    def _sync_rect(self, rect):
+        x0, y0, x1, y1 = rect
+        for y in range(y0, y1):
+            for x in range(x0, x1):
+                self._sync_cell((x, y))
+
+    def _scroll(self, view):
+        x0, y0 = view[0] * self.cell_size, view[1] * self.cell_size
+        self.canvas.xview_moveto(view[0] / self.engine.cols)
+        self.canvas.yview_moveto(view[1] / self.engine.rows)
+        self._place(self._grid, x0, y0)
+        self._place_overlay(x0, y0)
+
+    def _draw_snake(self, game, alpha):
+        # One shimmer color for the whole body; every body item (hidden spares
+        # included) carries the 'cell' tag, so recoloring is a single call
+        palette = self.palette
+        table = palette.body_invincible if game.invincible > 0 else palette.body
+        fill = table[INTENSITY_LEVELS - 1][palette.phase(game.animation_frame * 0.1)]
+        if fill != self._body_fill:
+            self.canvas.itemconfig('cell', fill=fill)
+            self._body_fill = fill
+
+        engine = self.engine
+        view = self._camera(engine.snake[0])
+        old = self._view
+
+        if old is None or engine.dirty_all:
+            # New game: drop every item and scan the whole view
+            for cell in list(self._cells):
+                self._release(cell)
+            self._sync_rect(view)
+            engine.dirty_all = False
+        elif view != old:
+            for rect in _outside(old, view):
+                for y in range(rect[1], rect[3]):
+                    for x in range(rect[0], rect[2]):
+                        if (x, y) in self._cells:
+                            self._release((x, y))
+            for rect in _outside(view, old):
+                self._sync_rect(rect)
+
+        x0, y0, x1, y1 = view
+        for cell in engine.dirty:
+            if x0 <= cell[0] < x1 and y0 <= cell[1] < y1:
+                self._sync_cell(cell)
+        engine.dirty.clear()
+
+        if view != old:
+            self._scroll(view)
+            self._view = view
+
+        cells = engine.snake
+        previous_head = cells[1] if len(cells) > 1 else engine.vacated
+        self._draw_head(game, self._lerp_box(previous_head, cells[0], alpha))
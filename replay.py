@@ -0,0 +1,166 @@
+"""Compact binary game recordings: a seed plus the tick of every turn.
+
+File layout (all integers are unsigned LEB128 varints):
+
+    b'SNKR' version cols rows seed
+    record*            (tick - previous_tick + 1) << 2 | direction_code
+    0 ticks score      footer, written when the game ends
+
+Direction codes are indexes into engine.DIRECTIONS, so a turn usually costs
+a single byte. A log cut short by a crash simply has no footer.
+"""
+from engine import DIRECTIONS, SnakeEngine
+
+MAGIC = b'SNKR'
+VERSION = 1
+
+
+def encode_varint(value):
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        if pos >= len(data):
+            raise EOFError("truncated varint")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class ReplayWriter:
+    """Streams one game's turns to a file; attach it as `engine.recorder`.
+
+    The file is unbuffered: each turn reaches the OS as it is recorded, so
+    the log of a game that crashes or is killed is complete up to its last
+    turn. Turns come at most once per tick, so that is one small write per
+    turn.
+    """
+
+    def __init__(self, path, cols, rows, seed):
+        self.path = path
+        self._file = open(path, 'wb', buffering=0)
+        self._file.write(MAGIC + bytes([VERSION]) + encode_varint(cols)
+                         + encode_varint(rows) + encode_varint(seed))
+        self._last_tick = 0
+
+    def record(self, tick, direction):
+        delta = tick - self._last_tick
+        self._last_tick = tick
+        self._file.write(encode_varint((delta + 1) << 2 | DIRECTIONS.index(direction)))
+
+    def finish(self, ticks, score):
+        self._file.write(b'\0' + encode_varint(ticks) + encode_varint(score))
+        self.close()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class Replay:
+    """A parsed recording: board size, seed, turns and (if finished) the result"""
+
+    def __init__(self, cols, rows, seed, turns, ticks=None, score=None):
+        self.cols = cols
+        self.rows = rows
+        self.seed = seed
+        self.turns = turns  # {tick: direction}
+        self.ticks = ticks
+        self.score = score
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:4] != MAGIC:
+            raise ValueError(f"{path} is not a snake replay")
+        if data[4] != VERSION:
+            raise ValueError(f"unsupported replay version {data[4]}")
+
+        pos = 5
+        cols, pos = _read_varint(data, pos)
+        rows, pos = _read_varint(data, pos)
+        seed, pos = _read_varint(data, pos)
+
+        turns = {}
+        tick = 0
+        while pos < len(data):
+            try:
+                value, pos = _read_varint(data, pos)
+                if value == 0:
+                    ticks, pos = _read_varint(data, pos)
+                    score, pos = _read_varint(data, pos)
+                    return cls(cols, rows, seed, turns, ticks, score)
+            except EOFError:
+                break  # torn write at the end of an unfinished log
+            tick += (value >> 2) - 1
+            turns[tick] = DIRECTIONS[value & 3]
+        return cls(cols, rows, seed, turns)
+
+    def new_engine(self):
+        return SnakeEngine(self.cols, self.rows, seed=self.seed)
+
+    def apply(self, engine):
+        """Set the direction recorded for the engine's next tick, if any.
+
+        Assigned directly rather than through engine.turn: the log holds the
+        directions that were actually applied, already validated.
+        """
+        direction = self.turns.get(engine.tick)
+        if direction is not None:
+            engine.direction = direction
+
+    def run(self, max_ticks=None):
+        """Re-run the game through the rules as fast as possible; returns the engine.
+
+        Stops at the recorded end, or at the last recorded turn for a log
+        without a footer, since nothing is known past it.
+        """
+        if max_ticks is None:
+            max_ticks = self.ticks if self.ticks is not None else max(self.turns, default=0)
+        engine = self.new_engine()
+        while not engine.game_over and engine.tick <= max_ticks:
+            self.apply(engine)
+            engine.step()
+        return engine
+
+    def verify(self):
+        """True if re-running the turns reproduces the recorded ticks and score"""
+        if self.ticks is None:
+            return False
+        engine = self.run()
+        return engine.game_over and engine.tick == self.ticks and engine.score == self.score
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Verify recorded snake games")
+    parser.add_argument('paths', nargs='+')
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.paths:
+        replay = Replay.load(path)
+        if replay.verify():
+            print(f"{path}: OK, score {replay.score} in {replay.ticks} ticks")
+        else:
+            failed = True
+            engine = replay.run()
+            print(f"{path}: MISMATCH, recorded {replay.score} in {replay.ticks} ticks, "
+                  f"replayed {engine.score} in {engine.tick} ticks")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
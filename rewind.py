@@ -0,0 +1,40 @@
+"""Bounded history of engine undo records, for rewinding a game tick by tick."""
+
+
+class RewindBuffer:
+    """The last `capacity` records (see SnakeEngine.undo), newest on top.
+
+    Slots are reused in a ring, so pushing past capacity drops the oldest
+    record. A record is a few scalars, plus the RNG state (about 25 KB) on
+    ticks that spawn food, so memory does not depend on the board size.
+    """
+
+    def __init__(self, capacity=100):
+        self._slots = [None] * capacity
+        self._top = 0  # slot the next push goes to
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def push(self, record):
+        slots = self._slots
+        top = self._top
+        slots[top] = record
+        top += 1
+        self._top = 0 if top == len(slots) else top
+        if self._count < len(slots):
+            self._count += 1
+
+    def pop(self):
+        """Take the newest record, or None once the history is used up"""
+        if not self._count:
+            return None
+        self._top = (self._top - 1) % len(self._slots)
+        self._count -= 1
+        record, self._slots[self._top] = self._slots[self._top], None
+        return record
+
+    def clear(self):
+        self._slots = [None] * len(self._slots)
+        self._top = self._count = 0
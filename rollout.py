@@ -0,0 +1,135 @@
+"""Parallel self-play: worker processes run headless games and write the
+results straight into shared memory instead of pickling them back."""
+import multiprocessing as mp
+import os
+import random
+from multiprocessing import shared_memory
+
+from engine import DIRECTIONS, SnakeEngine
+
+# Per-game summary record in the shared results buffer (int64 fields)
+SCORE, LENGTH, TICKS, WON = range(4)
+RECORD_FIELDS = 4
+
+# Trajectory byte for a tick where the policy kept going straight
+STRAIGHT = 0xFF
+
+
+def game_seed(base_seed, game):
+    """Seed of one game, independent of how games are split across workers"""
+    return (base_seed << 32) | game
+
+
+def greedy_policy(engine, rng):
+    """Head for the food along a safe cell, turning at random when boxed in"""
+    head_x, head_y = engine.snake[0]
+    food_x, food_y = engine.food
+    best = None
+    for code, (dx, dy) in enumerate(DIRECTIONS):
+        if (dx, dy) == (-engine.direction[0], -engine.direction[1]):
+            continue
+        x, y = head_x + dx, head_y + dy
+        if not (0 <= x < engine.cols and 0 <= y < engine.rows) or engine.is_occupied((x, y)):
+            continue
+        distance = abs(x - food_x) + abs(y - food_y) + rng.random()
+        if best is None or distance < best[0]:
+            best = (distance, code)
+    return best[1] if best else rng.randrange(4)
+
+
+class _Results:
+    """Typed views over the shared-memory blocks of one rollout batch"""
+
+    def __init__(self, summary, trajectories):
+        self.summary = summary.buf.cast('q')
+        self.trajectories = trajectories.buf
+
+    def release(self):
+        self.summary.release()
+        self.trajectories.release()
+
+
+def _worker(summary_name, trajectories_name, games, max_ticks, base_seed, cols, rows, start):
+    summary = shared_memory.SharedMemory(name=summary_name)
+    trajectories = shared_memory.SharedMemory(name=trajectories_name)
+    out = _Results(summary, trajectories)
+    try:
+        # One engine per worker, reset in place between games
+        engine = SnakeEngine(cols, rows)
+        for game in games:
+            seed = game_seed(base_seed, game)
+            if start is None:
+                engine.reset(seed)
+            else:
+                engine.restore(start)
+                engine.rng.seed(seed)  # same position, different food from here on
+            first_tick = engine.tick
+            policy_rng = random.Random(f"{seed}:policy")
+            offset = game * max_ticks
+
+            while not engine.game_over and engine.tick - first_tick < max_ticks:
+                code = greedy_policy(engine, policy_rng)
+                before = engine.direction
+                tick = engine.tick - first_tick
+                engine.step(DIRECTIONS[code])
+                out.trajectories[offset + tick] = code if engine.direction != before else STRAIGHT
+
+            record = game * RECORD_FIELDS
+            out.summary[record + SCORE] = engine.score
+            out.summary[record + LENGTH] = len(engine.snake)
+            out.summary[record + TICKS] = engine.tick - first_tick
+            out.summary[record + WON] = engine.won
+    finally:
+        out.release()
+        summary.close()
+        trajectories.close()
+
+
+def run_rollouts(num_games, workers=None, base_seed=0, max_ticks=2000, cols=30, rows=30,
+                 start=None):
+    """Play `num_games` games across `workers` processes.
+
+    Returns (summaries, trajectories): one (score, length, ticks, won) tuple
+    per game, and per game a bytes object with the direction code applied on
+    each tick (STRAIGHT when unchanged). Each game's seed comes from
+    game_seed(base_seed, game), so results do not depend on `workers`.
+
+    With `start` (a SnakeEngine.snapshot), every game continues from that
+    position instead of a new game, reseeded for its food; ticks and
+    trajectories count from the snapshot, and the board size is its own.
+    """
+    workers = workers or os.cpu_count() or 1
+    summary = shared_memory.SharedMemory(create=True, size=max(1, num_games * RECORD_FIELDS * 8))
+    trajectories = shared_memory.SharedMemory(create=True, size=max(1, num_games * max_ticks))
+    try:
+        processes = []
+        for worker in range(workers):
+            games = range(worker, num_games, workers)
+            process = mp.Process(target=_worker,
+                                 args=(summary.name, trajectories.name, games,
+                                       max_ticks, base_seed, cols, rows, start))
+            process.start()
+            processes.append(process)
+        for process in processes:
+            process.join()
+            if process.exitcode != 0:
+                raise RuntimeError(f"rollout worker exited with code {process.exitcode}")
+
+        out = _Results(summary, trajectories)
+        try:
+            summaries = []
+            paths = []
+            for game in range(num_games):
+                record = game * RECORD_FIELDS
+                score, length, ticks, won = out.summary[record:record + RECORD_FIELDS]
+                summaries.append((score, length, ticks, bool(won)))
+                offset = game * max_ticks
+                paths.append(bytes(out.trajectories[offset:offset + ticks]))
+        finally:
+            out.release()
+        return summaries, paths
+    finally:
+        summary.close()
+        summary.unlink()
+        trajectories.close()
+        trajectories.unlink()
@@ -0,0 +1,87 @@
+import time
+
+
+class _FixedStep:
+    """One fixed-timestep channel: a callback and an accumulator of owed time"""
+
+    def __init__(self, callback, interval):
+        self.callback = callback
+        self.interval = interval  # callable returning seconds per step
+        self.accumulator = 0.0
+
+
+class FixedTimestepScheduler:
+    """Single Tk loop that runs fixed-rate simulation steps and renders separately.
+
+    Wall time from `time.perf_counter` is added to an accumulator per channel
+    and paid out in whole steps, so simulation speed never depends on how long
+    frames take. Rendering happens at `fps`; when a frame is late the missed
+    frames are skipped rather than queued. The renderer is passed the fraction
+    of the next simulation step already elapsed, for interpolation.
+    """
+
+    def __init__(self, root, render, fps=60, max_steps=5, clock=time.perf_counter):
+        self.root = root
+        self.render = render
+        self.frame_interval = 1.0 / fps
+        self.max_steps = max_steps  # per channel per pump, so a stall can't snowball
+        self.clock = clock
+        self._channels = []
+        self._after_id = None
+        self._last = None
+        self._next_frame = 0.0
+
+    def add_fixed_step(self, callback, interval):
+        """Call `callback` every `interval()` seconds of wall time; returns the channel"""
+        channel = _FixedStep(callback, interval)
+        self._channels.append(channel)
+        return channel
+
+    def start(self):
+        self._last = self.clock()
+        self._next_frame = self._last
+        self._pump()
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def reset_channel(self, channel):
+        """Drop any time a channel is owed, e.g. after a pause or restart"""
+        channel.accumulator = 0.0
+
+    def alpha(self, channel):
+        """Fraction of the channel's next step that has already elapsed"""
+        return min(1.0, channel.accumulator / channel.interval())
+
+    def _pump(self):
+        now = self.clock()
+        elapsed = now - self._last
+        self._last = now
+
+        wait = self.frame_interval
+        for channel in self._channels:
+            channel.accumulator += elapsed
+            interval = channel.interval()
+            steps = 0
+            while channel.accumulator >= interval:
+                if steps == self.max_steps:
+                    # Too far behind: forget the backlog instead of spiralling
+                    channel.accumulator = 0.0
+                    break
+                channel.callback()
+                channel.accumulator -= interval
+                interval = channel.interval()
+                steps += 1
+            wait = min(wait, interval - channel.accumulator)
+
+        if now >= self._next_frame:
+            self.render()
+            self._next_frame += self.frame_interval
+            if self._next_frame <= now:
+                # Rendering fell behind; skip the missed frames
+                self._next_frame = now + self.frame_interval
+        wait = min(wait, self._next_frame - now)
+
+        self._after_id = self.root.after(max(1, int(wait * 1000)), self._pump)
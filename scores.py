@@ -0,0 +1,230 @@
+"""Persistent high scores and per-game statistics.
+
+Games are appended to a JSON-lines log, one object per line:
+
+    {"kind": "game", "score": ..., "length": ..., "power_ups": ...,
+     "ticks": ..., "seconds": ..., "cause": ..., "time": ..., "seed": ...}
+    {"kind": "totals", "games": ..., "power_ups": ..., "ticks": ...,
+     "seconds": ..., "causes": {...}}
+
+A totals line sums up games that compaction dropped from the log. A crash
+can leave at most a torn last line; it is skipped on load and the next
+write starts on a fresh line.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from bisect import bisect_right
+
+_STOP = object()  # queue marker: flush and end the writer thread
+
+
+def _empty_totals():
+    return {'games': 0, 'power_ups': 0, 'ticks': 0, 'seconds': 0.0, 'causes': {}}
+
+
+def _add_game(totals, game):
+    totals['games'] += 1
+    totals['power_ups'] += game['power_ups']
+    totals['ticks'] += game['ticks']
+    totals['seconds'] += game['seconds']
+    causes = totals['causes']
+    causes[game['cause']] = causes.get(game['cause'], 0) + 1
+
+
+def _add_totals(totals, other):
+    for key in ('games', 'power_ups', 'ticks', 'seconds'):
+        totals[key] += other[key]
+    for cause, count in other['causes'].items():
+        totals['causes'][cause] = totals['causes'].get(cause, 0) + count
+
+
+def _read_log(path):
+    """Totals and game records in a log; missing files and torn lines are skipped"""
+    totals = _empty_totals()
+    games = []
+    try:
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('kind') == 'game':
+                    games.append(record)
+                elif record.get('kind') == 'totals':
+                    _add_totals(totals, record)
+    except FileNotFoundError:
+        pass
+    return totals, games
+
+
+class ScoreStore:
+    """High-score table and lifetime stats, saved without blocking the game.
+
+    `record` updates the in-memory leaderboard and totals at once and
+    queues the game for a background thread, which appends each batch of
+    games with a single write and fsync, so the Tk thread never waits on
+    the disk. The leaderboard is kept sorted as games arrive, so reading
+    it or the best score costs nothing.
+
+    Once the log reaches twice `keep` lines, the writer rewrites it to the
+    `keep` best games plus one totals line for the rest, and swaps the new
+    file in atomically.
+
+    A failed write does not lose anything: the games stay queued for the
+    next batch, and `error` holds the failure until a write succeeds.
+    """
+
+    def __init__(self, path, top=10, keep=1000, batch_interval=1.0):
+        self.path = path
+        self.top = top
+        self.keep = keep
+        self.batch_interval = batch_interval
+        self.totals = _empty_totals()
+        self._leaders = []  # best `top` games, highest score first
+        self._keys = []  # -score of each leader, for bisect
+        self._queue = queue.SimpleQueue()
+        self._writer = None
+        self._lines = 0  # lines in the log, as far as the writer knows
+        self.error = None  # OSError from the writer's last attempt, if it failed
+
+    @property
+    def leaderboard(self):
+        """The best games, highest score first; treat as read-only"""
+        return self._leaders
+
+    @property
+    def best(self):
+        return self._leaders[0]['score'] if self._leaders else 0
+
+    def open(self):
+        """Read the saved games and start the writer; games recorded before this are kept.
+
+        Raises OSError if the log cannot be opened for appending.
+        """
+        file = self._open_log()
+        try:
+            totals, games = _read_log(self.path)
+        except BaseException:
+            file.close()
+            raise
+        _add_totals(self.totals, totals)
+        for game in games:
+            _add_game(self.totals, game)
+            self._index(game)
+        self._lines = len(games) + 1
+        self._writer = threading.Thread(target=self._write_loop, args=(file,), name='scores',
+                                        daemon=True)
+        self._writer.start()
+
+    def record(self, score, length, power_ups, ticks, seconds, cause, when, seed):
+        """Add a finished game; returns its place on the leaderboard (1-based) or None"""
+        game = {'kind': 'game', 'score': score, 'length': length, 'power_ups': power_ups,
+                'ticks': ticks, 'seconds': round(seconds, 3), 'cause': cause,
+                'time': round(when, 3), 'seed': seed}
+        _add_game(self.totals, game)
+        self._queue.put(game)
+        return self._index(game)
+
+    def close(self):
+        """Write out everything recorded so far and stop the writer"""
+        if self._writer is not None:
+            self._queue.put(_STOP)
+            self._writer.join()
+            self._writer = None
+
+    def _index(self, game):
+        # Ties go after the games already there: the earlier score keeps its place
+        pos = bisect_right(self._keys, -game['score'])
+        if pos >= self.top:
+            return None
+        self._keys.insert(pos, -game['score'])
+        self._leaders.insert(pos, game)
+        if len(self._leaders) > self.top:
+            self._keys.pop()
+            self._leaders.pop()
+        return pos + 1
+
+    # -- writer thread -------------------------------------------------------------------
+
+    def _write_loop(self, file):
+        games = []  # recorded but not yet on disk
+        start = None  # log size before the batch being written
+        try:
+            while True:
+                # Wait for a game, then collect whatever else arrives shortly after
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + self.batch_interval
+                while batch[-1] is not _STOP:
+                    try:
+                        batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                    except queue.Empty:
+                        break
+                games += [game for game in batch if game is not _STOP]
+                try:
+                    if file is None:
+                        file = self._open_log()
+                    if games:
+                        start = file.tell()
+                        file.write(b''.join(json.dumps(game).encode() + b'\n' for game in games))
+                        file.flush()
+                        os.fsync(file.fileno())
+                        self._lines += len(games)
+                        games = []
+                        start = None
+                    if batch[-1] is not _STOP and self._lines >= 2 * self.keep:
+                        file.close()
+                        file = None
+                        self._compact()
+                    self.error = None
+                except OSError as error:
+                    # Keep the games for the next batch, and cut off whatever
+                    # part of it reached the log so it is not written twice
+                    self.error = error
+                    if file is not None:
+                        try:
+                            file.close()
+                        except OSError:
+                            pass  # drops what is still buffered; it is retried
+                        file = None
+                    if start is not None:
+                        try:
+                            os.truncate(self.path, start)
+                            start = None
+                        except OSError:
+                            pass  # try again after the next attempt
+                if batch[-1] is _STOP:
+                    return
+        finally:
+            if file is not None:
+                file.close()
+
+    def _open_log(self):
+        file = open(self.path, 'ab')
+        if file.tell() > 0:
+            with open(self.path, 'rb') as check:
+                check.seek(-1, os.SEEK_END)
+                if check.read(1) != b'\n':
+                    file.write(b'\n')  # close off a line torn by a crash
+        return file
+
+    def _compact(self):
+        totals, games = _read_log(self.path)
+        games.sort(key=lambda game: -game['score'])
+        for game in games[self.keep:]:
+            _add_game(totals, game)
+        kept = games[:self.keep]
+        kept.sort(key=lambda game: game['time'])
+
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            file.write(json.dumps(dict(totals, kind='totals')) + '\n')
+            for game in kept:
+                file.write(json.dumps(game) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+        self._lines = len(kept) + 1
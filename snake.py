@@ -1,48 +1,135 @@
-import tkinter as tk
-from tkinter import messagebox
+import os
 import random
 import time
-import math
+
+_START = time.perf_counter()  # time to first frame is measured from here
+
+# tkinter is imported when the window is built, so importing this module
+# (e.g. for headless tools) stays cheap
+from autopilot import Autopilot, hamiltonian_cycle
+from engine import SnakeEngine, UP, DOWN, LEFT, RIGHT, snapshot_board
+from inputs import InputQueue
+from particles import ParticlePool, TextPool
+from powerups import POWER_UPS
+from profiler import Profiler
+from renderer import CanvasRenderer, LargeBoardRenderer
+from replay import Replay, ReplayWriter
+from rewind import RewindBuffer
+from scheduler import FixedTimestepScheduler
+
+# Methods timed by the profiler overlay (F3)
+PROFILED = ('move_snake', 'animate', 'update_display')
+
+# Quick save slot (F5 saves, F9 loads), in the working directory
+SAVE_FILE = 'snake-save.snks'
 
 class AwesomeSnake:
-    def __init__(self):
+    def __init__(self, record_dir=None, replay=None, cols=30, rows=30, view_size=30,
+                 profile=False, demo=False, connect=None, scores=None):
+        import tkinter as tk
+
         self.root = tk.Tk()
         self.root.title("🐍 Awesome Snake Game!")
         self.root.configure(bg='#1a1a2e')
         self.root.resizable(False, False)
         
-        # Game settings
-        self.board_width = 600
-        self.board_height = 600
+        self.record_dir = record_dir
+        self.scores_path = scores
+        self.scores = None  # ScoreStore, opened after the first frame
+        self.replay = Replay.load(replay) if replay else None
+        
+        # Multiplayer: the server owns the game and the board size; netplay
+        # (and with it asyncio) is only imported when joining one
+        self.remote = None
+        if connect:
+            from netplay import RemoteArena
+            host, _, port = connect.rpartition(':')
+            self.remote = RemoteArena(host, int(port))
+            cols, rows = self.remote.cols, self.remote.rows
+        
+        # Game settings; boards larger than view_size cells scroll with the head.
+        # Multiplayer always uses the scrolling renderer, which draws every
+        # snake on the board rather than just the player's.
         self.cell_size = 20
-        self.cols = self.board_width // self.cell_size
-        self.rows = self.board_height // self.cell_size
-        
-        # Game state
-        self.snake = [(15, 15)]  # Start in center
-        self.direction = (1, 0)  # Moving right
-        self.food = self.spawn_food()
-        self.score = 0
-        self.high_score = 0
-        self.game_over = False
+        self.cols = self.replay.cols if self.replay else cols
+        self.rows = self.replay.rows if self.replay else rows
+        self.large_board = bool(self.remote) or self.cols > view_size or self.rows > view_size
+        self.view_cols = min(self.cols, view_size)
+        self.view_rows = min(self.rows, view_size)
+        self.board_width = self.view_cols * self.cell_size
+        self.board_height = self.view_rows * self.cell_size
+        
+        # Game state lives in the headless engine; this class is only the view
+        if self.replay:
+            self.engine = self.replay.new_engine()
+        elif self.remote:
+            self.engine = self.remote
+        else:
+            self.engine = SnakeEngine(self.cols, self.rows)
+        self.start_recording()
+        self.inputs = InputQueue(depth=3)
         self.paused = False
         self.speed = 150  # milliseconds
+        self.fps = 60
         
-        # Animation variables
+        # Animation variables; pulse and shimmer colors are looked up from
+        # the renderer's palette by animation_frame
         self.animation_frame = 0
-        self.food_pulse = 0
-        self.snake_shimmer = 0
-        self.particle_effects = []
-        self.text_animations = []
-        
-        # Power-ups
-        self.power_up = None
-        self.power_up_timer = 0
-        self.power_up_pulse = 0
-        self.invincible = 0
-        self.speed_boost = 0
-        
-        # UI Setup
+        self.particles = ParticlePool(capacity=256)
+        self.texts = TextPool(capacity=32)
+        
+        # Per-game stats for the score store
+        self.power_ups_taken = 0
+        self.game_started = time.time()
+        
+        # Rewind (hold Backspace): the engine keeps an undo record per tick.
+        # Rewound or loaded games are not scored.
+        self.rewind = RewindBuffer(capacity=100)
+        if not self.remote:
+            self.engine.history = self.rewind
+        self.rewinding = False
+        self.rewound = False
+        self._rewind_release = None
+        
+        # Profiler: off by default, in which case nothing is timed at all
+        self.profiler = Profiler()
+        self._stats_due = 0.0
+        
+        # Attract mode: the autopilot plays and games restart by themselves
+        # until someone presses a movement key
+        self.demo = demo and not self.replay and not self.remote
+        self.autopilot = None
+        self._demo_restart = None
+        
+        # Cold start: only the canvas exists for the first frame. The rest of
+        # the window, the game loop and the tables the first frame does not
+        # need are built afterwards in idle callbacks.
+        self.setup_canvas()
+        self.renderer.render(self)
+        self.root.update_idletasks()
+        self.first_frame_time = time.perf_counter() - _START
+        self._profile_at_start = profile
+        self.root.after_idle(self.finish_startup)
+    
+    def setup_canvas(self):
+        import tkinter as tk
+        
+        # Game canvas
+        self.canvas = tk.Canvas(self.root, 
+                               width=self.board_width, 
+                               height=self.board_height,
+                               bg="#0f3460",
+                               highlightthickness=0)
+        self.canvas.pack(pady=10)
+        if self.large_board:
+            self.renderer = LargeBoardRenderer(self.canvas, self.engine, self.view_cols,
+                                               self.view_rows, self.cell_size)
+        else:
+            self.renderer = CanvasRenderer(self.canvas, self.board_width,
+                                           self.board_height, self.cell_size)
+    
+    def finish_startup(self):
+        """Everything after the first frame: widgets, key bindings, the game loop"""
         self.setup_ui()
         
         # Key bindings - FIXED!
@@ -50,21 +137,52 @@ class AwesomeSnake:
         self.root.bind('<KeyRelease>', self.on_key_release)
         self.root.focus_set()
         
-        # Start animation loop
-        self.animate()
-        # Start game loop
-        self.game_loop()
+        # One scheduler runs game ticks and animation at fixed rates and
+        # renders at its own frame rate in between
+        self.scheduler = FixedTimestepScheduler(self.root, self.render_frame, fps=self.fps)
+        self.tick_channel = self.scheduler.add_fixed_step(self.move_snake, self.tick_interval)
+        self.animation_channel = self.scheduler.add_fixed_step(self.animate, lambda: 0.05)
+        if self._profile_at_start:
+            self.toggle_profiler()
+        if self.demo:
+            self.toggle_autopilot()
+        self.scheduler.start()
+        
+        self.run_deferred(self.renderer.deferred_setup() + [self.open_scores])
+    
+    def open_scores(self):
+        """Load saved high scores; multiplayer scores are the server's business"""
+        if not self.scores_path or self.remote:
+            return
+        from scores import ScoreStore
+        scores = ScoreStore(self.scores_path)
+        try:
+            scores.open()
+        except OSError as error:
+            self.status_label.config(text=f"⚠️ High scores are not kept: {error}")
+            return
+        self.scores = scores
+        self.engine.high_score = max(self.engine.high_score, self.scores.best)
+    
+    def run_deferred(self, jobs):
+        """Run setup jobs one per idle callback, so none delays a frame or tick for long"""
+        if jobs:
+            jobs[0]()
+            self.root.after_idle(self.run_deferred, jobs[1:])
     
     def setup_ui(self):
+        """Labels and buttons around the canvas"""
+        import tkinter as tk
+        
         # Title with gradient effect
         title = tk.Label(self.root, text="🐍 AWESOME SNAKE GAME 🐍", 
                         font=("Arial", 20, "bold"), 
                         fg="#00ff88", bg="#1a1a2e")
-        title.pack(pady=5)
+        title.pack(pady=5, before=self.canvas)
         
         # Score display
         self.score_frame = tk.Frame(self.root, bg="#1a1a2e")
-        self.score_frame.pack()
+        self.score_frame.pack(before=self.canvas)
         
         self.score_label = tk.Label(self.score_frame, text="Score: 0", 
                                    font=("Arial", 14, "bold"), 
@@ -76,14 +194,6 @@ class AwesomeSnake:
                                         fg="#ff6b35", bg="#1a1a2e")
         self.high_score_label.pack(side=tk.RIGHT, padx=20)
         
-        # Game canvas
-        self.canvas = tk.Canvas(self.root, 
-                               width=self.board_width, 
-                               height=self.board_height,
-                               bg="#0f3460",
-                               highlightthickness=0)
-        self.canvas.pack(pady=10)
-        
         # Status display
         self.status_label = tk.Label(self.root, text="Use WASD or Arrow Keys to move • Press R to restart", 
                                     font=("Arial", 12), 
@@ -108,50 +218,39 @@ class AwesomeSnake:
                                   relief="flat", padx=20)
         self.pause_btn.pack(side=tk.LEFT, padx=5)
     
-    def spawn_food(self):
-        while True:
-            x = random.randint(0, self.cols - 1)
-            y = random.randint(0, self.rows - 1)
-            if (x, y) not in self.snake:
-                return (x, y)
-    
-    def spawn_power_up(self):
-        if random.random() < 0.3:  # 30% chance
-            while True:
-                x = random.randint(0, self.cols - 1)
-                y = random.randint(0, self.rows - 1)
-                if (x, y) not in self.snake and (x, y) != self.food:
-                    power_type = random.choice(['invincible', 'speed', 'double_points'])
-                    self.power_up = (x, y, power_type)
-                    self.power_up_timer = 100  # Disappears after 100 game ticks
-                    break
+    # Read-only views of the engine state used by the renderer and status bar
+    snake = property(lambda self: self.engine.snake)
+    direction = property(lambda self: self.engine.direction)
+    food = property(lambda self: self.engine.food)
+    power_up = property(lambda self: self.engine.power_up)
+    score = property(lambda self: self.engine.score)
+    high_score = property(lambda self: self.engine.high_score)
+    game_over = property(lambda self: self.engine.game_over)
+    won = property(lambda self: self.engine.won)
+    invincible = property(lambda self: self.engine.invincible)
+    speed_boost = property(lambda self: self.engine.speed_boost)
     
     def add_particle_effect(self, x, y, color="#ffff00", count=5):
         """Add particle explosion effect"""
         for _ in range(count):
-            particle = {
-                'x': x,
-                'y': y,
-                'vx': random.uniform(-3, 3),
-                'vy': random.uniform(-3, 3),
-                'life': 20,
-                'color': color,
-                'size': random.uniform(2, 4)
-            }
-            self.particle_effects.append(particle)
+            self.particles.emit(x, y, random.uniform(-3, 3), random.uniform(-3, 3),
+                                20, color, random.uniform(2, 4))
     
     def add_text_animation(self, text, x, y, color="#ffff00"):
         """Add floating text animation"""
-        anim = {
-            'text': text,
-            'x': x,
-            'y': y,
-            'vy': -2,
-            'life': 30,
-            'color': color,
-            'size': 16
-        }
-        self.text_animations.append(anim)
+        self.texts.emit(text, x, y, -2, 30, color, 16)
+    
+    def start_recording(self):
+        """Stream the current game to a new replay file when recording is on"""
+        if self.engine.recorder:
+            self.engine.recorder.close()
+            self.engine.recorder = None
+        if not self.record_dir or self.replay or self.remote:
+            return
+        os.makedirs(self.record_dir, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{self.engine.seed}.snkr"
+        self.engine.recorder = ReplayWriter(os.path.join(self.record_dir, name),
+                                            self.cols, self.rows, self.engine.seed)
     
     def on_key_press(self, event):
         key = event.keysym.lower()
@@ -161,350 +260,389 @@ class AwesomeSnake:
             self.restart_game()
             return
         
+        if key == 'space':
+            self.toggle_pause()
+            return
+        
+        if key == 'f3':
+            self.toggle_profiler()
+            return
+        
+        if key == 'f4':
+            self.dump_profile()
+            return
+        
+        if key == 'f2':
+            self.toggle_autopilot()
+            return
+        
+        if key == 'backspace':
+            self.start_rewind()
+            return
+        
+        if key == 'f5':
+            self.save_game()
+            return
+        
+        if key == 'f9':
+            self.load_game()
+            return
+        
+        # Replays are driven by the log, not the keyboard
+        if self.replay:
+            return
+        
+        # A player walking up to the demo gets a fresh game
+        if self.demo and key in ('w', 'up', 's', 'down', 'a', 'left', 'd', 'right'):
+            self.demo = False
+            self.autopilot = None  # off even if F2 already took it back
+            self.update_status()
+            self.restart_game()
+            return
+        
         if self.game_over:
             return
         
-        # Movement controls
-        if key in ['w', 'up'] and self.direction != (0, 1):
-            self.direction = (0, -1)
-        elif key in ['s', 'down'] and self.direction != (0, -1):
-            self.direction = (0, 1)
-        elif key in ['a', 'left'] and self.direction != (1, 0):
-            self.direction = (-1, 0)
-        elif key in ['d', 'right'] and self.direction != (-1, 0):
-            self.direction = (1, 0)
-        elif key == 'space':
-            self.toggle_pause()
+        # Movement controls: queued and applied one per tick, except on a
+        # server, which takes the turns as they come
+        turn = self.engine.turn if self.remote else self.inputs.push
+        if key in ['w', 'up']:
+            turn(UP)
+        elif key in ['s', 'down']:
+            turn(DOWN)
+        elif key in ['a', 'left']:
+            turn(LEFT)
+        elif key in ['d', 'right']:
+            turn(RIGHT)
     
     def on_key_release(self, event):
-        # Handle key release if needed
-        pass
+        # Held keys auto-repeat as release/press pairs, so only stop rewinding
+        # if no new press follows straight away
+        if event.keysym.lower() == 'backspace' and self.rewinding:
+            self._rewind_release = self.root.after(50, self.stop_rewind)
+    
+    def start_rewind(self):
+        if self._rewind_release is not None:
+            self.root.after_cancel(self._rewind_release)
+            self._rewind_release = None
+        if self.remote or self.demo:
+            return
+        self.rewinding = True
+    
+    def stop_rewind(self):
+        self._rewind_release = None
+        self.rewinding = False
+    
+    def rewind_step(self):
+        """Go back one tick, if there is history left"""
+        if self.engine.undo():
+            self.went_back()
+    
+    def restore_snapshot(self, snapshot):
+        self.engine.restore(snapshot)
+        self.went_back()
+    
+    def went_back(self):
+        """Catch up with an engine put back to an earlier state"""
+        if self._demo_restart is not None:
+            self.root.after_cancel(self._demo_restart)
+            self._demo_restart = None
+        self.inputs.clear()
+        self.rewound = True
+        if self.engine.recorder:
+            # The log can only describe a game played straight through
+            self.engine.recorder.close()
+            self.engine.recorder = None
+        if self.autopilot:
+            self.autopilot.reset()
+        self.update_status()
+    
+    def save_game(self):
+        if self.remote:
+            return
+        # Written aside and moved into place, so a failed save keeps the old one
+        temporary = SAVE_FILE + '.tmp'
+        try:
+            with open(temporary, 'wb') as f:
+                f.write(self.engine.snapshot())
+            os.replace(temporary, SAVE_FILE)
+        except OSError as error:
+            self.status_label.config(text=f"⚠️ Could not save: {error}")
+            return
+        self.status_label.config(text=f"💾 Saved to {SAVE_FILE} • F9 to load")
+    
+    def load_game(self):
+        if self.remote:
+            return
+        try:
+            with open(SAVE_FILE, 'rb') as f:
+                snapshot = f.read()
+            cols, rows = snapshot_board(snapshot)
+            if (cols, rows) != (self.cols, self.rows):
+                raise ValueError(f"the save is for a {cols}x{rows} board")
+            self.restore_snapshot(snapshot)  # leaves the game as it was if this raises
+        except (OSError, ValueError) as error:
+            self.status_label.config(text=f"⚠️ Could not load: {error}")
+            return
+        self.rewind.clear()
     
     def toggle_pause(self):
+        if self.remote:
+            return  # the server keeps going regardless
         self.paused = not self.paused
         if self.paused:
             self.status_label.config(text="⏸️ PAUSED - Press SPACE to continue")
         else:
             self.update_status()
     
+    def toggle_autopilot(self):
+        """Hand the snake to the autopilot or take it back"""
+        if self.replay or self.remote:
+            return
+        if self.autopilot:
+            self.autopilot = None
+        else:
+            self.autopilot = Autopilot(self.engine)
+        self.update_status()
+    
+    def toggle_profiler(self):
+        """Start or stop timing the hot paths and showing the stats overlay"""
+        if self.profiler.enabled:
+            self.profiler.detach()
+            self.renderer.draw_stats(None)
+        else:
+            self.profiler.attach(self, PROFILED)
+            self._stats_due = 0.0
+        # The scheduler holds the callbacks it was given; point it at the
+        # current (timed or plain) methods
+        self.tick_channel.callback = self.move_snake
+        self.animation_channel.callback = self.animate
+    
+    def dump_profile(self):
+        """Save the profiler's buffers as a Chrome trace in the working directory"""
+        try:
+            path = self.profiler.dump_trace(f"snake-trace-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        except OSError as error:
+            self.status_label.config(text=f"⚠️ Could not save the trace: {error}")
+            return
+        self.status_label.config(text=f"📈 Trace saved to {path}")
+    
+    def update_profiler(self):
+        """Sample the gauges every frame and refresh the overlay a few times a second"""
+        profiler = self.profiler
+        profiler.sample(canvas_items=self.renderer.item_count(),
+                        particles=len(self.particles), snake_length=len(self.snake))
+        now = time.perf_counter()
+        if now < self._stats_due:
+            return
+        self._stats_due = now + 0.25
+        
+        frame_p50, frame_p99 = profiler.percentiles('update_display', 50, 99)
+        tick_p50, tick_p99 = profiler.percentiles('move_snake', 50, 99)
+        input_p50, input_p99 = self.inputs.latency(50, 99)
+        self.renderer.draw_stats(
+            f"FPS {profiler.rate('update_display'):5.1f}\n"
+            f"frame p50 {frame_p50:6.2f} ms  p99 {frame_p99:6.2f} ms\n"
+            f"tick  p50 {tick_p50:6.2f} ms  p99 {tick_p99:6.2f} ms\n"
+            f"input p50 {input_p50:6.1f} ms  p99 {input_p99:6.1f} ms  "
+            f"dropped {self.inputs.dropped}\n"
+            f"items {self.renderer.item_count()}  particles {len(self.particles)}  "
+            f"length {len(self.snake)}")
+    
     def update_status(self):
         status = "Use WASD or Arrow Keys to move • Press R to restart"
-        if self.invincible > 0:
-            status = f"🛡️ INVINCIBLE! ({self.invincible//10}s left) • Press R to restart"
-        elif self.speed_boost > 0:
-            status = f"⚡ SPEED BOOST! ({self.speed_boost//10}s left) • Press R to restart"
+        if self.rewinding:
+            status = "⏪ REWINDING • Release Backspace to play on"
+        elif self.demo:
+            status = "🤖 DEMO • Press an Arrow Key to play"
+        elif self.autopilot:
+            status = "🤖 AUTOPILOT • Press F2 to take over"
+        else:
+            for power_up, left in self.engine.active_effects():
+                if power_up.status:
+                    status = f"{power_up.status} ({left//10}s left) • Press R to restart"
+                    break
         
-        self.status_label.config(text=status)
+        if self.status_label.cget('text') != status:
+            self.status_label.config(text=status)
     
     def move_snake(self):
-        if self.paused or self.game_over:
+        if self.paused:
             return
-        
-        # Get new head position
-        head_x, head_y = self.snake[0]
-        dx, dy = self.direction
-        new_head = (head_x + dx, head_y + dy)
-        
-        # Check wall collision (unless invincible)
-        if self.invincible <= 0:
-            if (new_head[0] < 0 or new_head[0] >= self.cols or 
-                new_head[1] < 0 or new_head[1] >= self.rows):
-                self.end_game()
-                return
-        else:
-            # Wrap around when invincible
-            new_head = (new_head[0] % self.cols, new_head[1] % self.rows)
-        
-        # Check self collision (unless invincible)
-        if self.invincible <= 0 and new_head in self.snake:
-            self.end_game()
+        if self.rewinding:
+            self.rewind_step()
+            return
+        # A remote board keeps changing while this player is dead
+        if self.game_over and not self.remote:
             return
         
-        # Add new head
-        self.snake.insert(0, new_head)
-        
-        # Check food collision
-        ate_food = False
-        if new_head == self.food:
-            ate_food = True
-            points = 10
-            if self.speed_boost > 0:
-                points *= 2  # Double points during speed boost
-            
-            self.score += points
-            
-            # Add cool effects when eating food
-            food_x, food_y = self.food
-            screen_x = food_x * self.cell_size + self.cell_size // 2
-            screen_y = food_y * self.cell_size + self.cell_size // 2
-            self.add_particle_effect(screen_x, screen_y, "#ff4444", 8)
-            self.add_text_animation(f"+{points}", screen_x, screen_y, "#ffff00")
-            
-            self.food = self.spawn_food()
-            
-            # Chance to spawn power-up
-            self.spawn_power_up()
-        else:
-            # Remove tail if no food eaten
-            self.snake.pop()
-        
-        # Check power-up collision
-        if self.power_up and new_head == (self.power_up[0], self.power_up[1]):
-            power_type = self.power_up[2]
-            power_x, power_y = self.power_up[0], self.power_up[1]
-            screen_x = power_x * self.cell_size + self.cell_size // 2
-            screen_y = power_y * self.cell_size + self.cell_size // 2
-            
-            if power_type == 'invincible':
-                self.invincible = 50  # 5 seconds
-                self.add_particle_effect(screen_x, screen_y, "#ff00ff", 12)
-                self.add_text_animation("INVINCIBLE!", screen_x, screen_y, "#ff00ff")
-            elif power_type == 'speed':
-                self.speed_boost = 50  # 5 seconds
-                self.add_particle_effect(screen_x, screen_y, "#ffff00", 12)
-                self.add_text_animation("SPEED BOOST!", screen_x, screen_y, "#ffff00")
-            elif power_type == 'double_points':
-                self.score += 50  # Bonus points
-                self.add_particle_effect(screen_x, screen_y, "#00ffff", 15)
-                self.add_text_animation("+50 BONUS!", screen_x, screen_y, "#00ffff")
+        if self.replay:
+            self.replay.apply(self.engine)
+        elif self.autopilot:
+            # Picks one turn per tick, so it steers through engine.turn
+            # directly rather than queueing like the arrow keys
+            self.engine.turn(self.autopilot.choose())
+        elif not self.remote:
+            self.inputs.apply(self.engine)
+        for kind, x, y, value in self.engine.step():
+            screen_x = x * self.cell_size + self.cell_size // 2
+            screen_y = y * self.cell_size + self.cell_size // 2
             
-            self.power_up = None
-        
-        # Update power-up timer
-        if self.power_up:
-            self.power_up_timer -= 1
-            if self.power_up_timer <= 0:
-                self.power_up = None
-        
-        # Update power-up effects
-        if self.invincible > 0:
-            self.invincible -= 1
-        if self.speed_boost > 0:
-            self.speed_boost -= 1
-        
-        # Update high score
-        if self.score > self.high_score:
-            self.high_score = self.score
+            if kind == 'food':
+                # Add cool effects when eating food
+                self.add_particle_effect(screen_x, screen_y, "#ff4444", 8)
+                self.add_text_animation(f"+{value}", screen_x, screen_y, "#ffff00")
+            elif kind == 'power_up':
+                self.power_ups_taken += 1
+                power_up = POWER_UPS[value]
+                self.add_particle_effect(screen_x, screen_y, power_up.color, power_up.particles)
+                self.add_text_animation(power_up.label, screen_x, screen_y, power_up.color)
+            elif kind == 'death':
+                self.end_game(value)
+            elif kind == 'win':
+                self.end_game('won')
     
     def animate(self):
         """Handle all animations"""
         self.animation_frame += 1
-        self.food_pulse = abs(math.sin(self.animation_frame * 0.2)) * 0.5 + 0.5
-        self.snake_shimmer = abs(math.sin(self.animation_frame * 0.1)) * 0.3 + 0.7
-        self.power_up_pulse = abs(math.sin(self.animation_frame * 0.3)) * 0.4 + 0.6
-        
-        # Update particles
-        for particle in self.particle_effects[:]:
-            particle['x'] += particle['vx']
-            particle['y'] += particle['vy']
-            particle['vy'] += 0.2  # Gravity
-            particle['life'] -= 1
-            particle['size'] *= 0.98
-            
-            if particle['life'] <= 0:
-                self.particle_effects.remove(particle)
         
-        # Update text animations
-        for text_anim in self.text_animations[:]:
-            text_anim['y'] += text_anim['vy']
-            text_anim['life'] -= 1
-            
-            if text_anim['life'] <= 0:
-                self.text_animations.remove(text_anim)
-        
-        # Continue animation loop
-        self.root.after(50, self.animate)
-    
-    def update_display(self):
-        self.canvas.delete("all")
-        
-        # Draw animated grid
-        grid_offset = (self.animation_frame % 20) * 0.1
-        for i in range(0, self.board_width, self.cell_size):
-            alpha = abs(math.sin((i + grid_offset) * 0.1)) * 0.3 + 0.1
-            color = f"#{int(22 + alpha * 100):02x}{int(83 + alpha * 50):02x}{int(126 + alpha * 50):02x}"
-            self.canvas.create_line(i, 0, i, self.board_height, fill=color, width=1)
-        for i in range(0, self.board_height, self.cell_size):
-            alpha = abs(math.sin((i + grid_offset) * 0.1)) * 0.3 + 0.1
-            color = f"#{int(22 + alpha * 100):02x}{int(83 + alpha * 50):02x}{int(126 + alpha * 50):02x}"
-            self.canvas.create_line(0, i, self.board_width, i, fill=color, width=1)
-        
-        # Draw snake with shimmer effect
-        for i, (x, y) in enumerate(self.snake):
-            x1, y1 = x * self.cell_size, y * self.cell_size
-            x2, y2 = x1 + self.cell_size, y1 + self.cell_size
-            
-            if i == 0:  # Head
-                # Animated head color
-                if self.invincible > 0:
-                    shimmer = abs(math.sin(self.animation_frame * 0.5))
-                    r = int(255 * shimmer)
-                    g = int(0 * shimmer)
-                    b = int(128 * shimmer)
-                    color = f"#{r:02x}{g:02x}{b:02x}"
-                else:
-                    shimmer = self.snake_shimmer
-                    r = int(0 * shimmer)
-                    g = int(255 * shimmer)
-                    b = int(136 * shimmer)
-                    color = f"#{r:02x}{g:02x}{b:02x}"
-                
-                self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="white", width=2)
-                
-                # Animated eyes
-                eye_blink = 1 if (self.animation_frame % 60) > 55 else 0
-                if not eye_blink:
-                    self.canvas.create_oval(x1+5, y1+5, x1+8, y1+8, fill="white")
-                    self.canvas.create_oval(x1+12, y1+5, x1+15, y1+8, fill="white")
-                    self.canvas.create_oval(x1+6, y1+6, x1+7, y1+7, fill="black")
-                    self.canvas.create_oval(x1+13, y1+6, x1+14, y1+7, fill="black")
-                else:
-                    self.canvas.create_line(x1+5, y1+6, x1+8, y1+6, fill="white", width=2)
-                    self.canvas.create_line(x1+12, y1+6, x1+15, y1+6, fill="white", width=2)
-                    
-            else:  # Body
-                intensity = max(0.3, 1 - (i * 0.1))
-                body_shimmer = abs(math.sin(self.animation_frame * 0.1 + i * 0.3)) * 0.2 + 0.8
-                
-                if self.invincible > 0:
-                    r = int(255 * intensity * body_shimmer)
-                    g = int(0 * intensity * body_shimmer)
-                    b = int(128 * intensity * body_shimmer)
-                else:
-                    r = int(0 * intensity * body_shimmer)
-                    g = int(255 * intensity * body_shimmer)
-                    b = int(136 * intensity * body_shimmer)
-                
-                color = f"#{r:02x}{g:02x}{b:02x}"
-                self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="#ffffff", width=1)
-        
-        # Draw animated food
-        fx, fy = self.food
-        fx1, fy1 = fx * self.cell_size, fy * self.cell_size
-        fx2, fy2 = fx1 + self.cell_size, fy1 + self.cell_size
-        
-        # Pulsing food
-        pulse_size = int(self.food_pulse * 4)
-        food_r = int(255 * self.food_pulse)
-        food_color = f"#{food_r:02x}4444"
-        
-        self.canvas.create_oval(fx1+2-pulse_size, fy1+2-pulse_size, 
-                               fx2-2+pulse_size, fy2-2+pulse_size, 
-                               fill=food_color, outline="#ffffff", width=2)
-        
-        # Draw animated power-up
-        if self.power_up:
-            px, py, ptype = self.power_up
-            px1, py1 = px * self.cell_size, py * self.cell_size
-            px2, py2 = px1 + self.cell_size, py1 + self.cell_size
-            
-            colors = {'invincible': '#ff00ff', 'speed': '#ffff00', 'double_points': '#00ffff'}
-            symbols = {'invincible': '🛡️', 'speed': '⚡', 'double_points': '💎'}
-            
-            # Pulsing power-up
-            pulse_size = int(self.power_up_pulse * 3)
-            base_color = colors[ptype]
-            
-            self.canvas.create_rectangle(px1-pulse_size, py1-pulse_size, 
-                                       px2+pulse_size, py2+pulse_size, 
-                                       fill=base_color, outline="white", width=2)
-            
-            # Rotating effect
-            rotation_offset = math.sin(self.animation_frame * 0.2) * 2
-            self.canvas.create_text(px1 + self.cell_size//2, py1 + self.cell_size//2 + rotation_offset,
-                                  text=symbols[ptype], font=("Arial", 12))
-        
-        # Draw particle effects
-        for particle in self.particle_effects:
-            if particle['life'] > 0:
-                alpha = particle['life'] / 20.0
-                size = particle['size']
-                self.canvas.create_oval(particle['x']-size, particle['y']-size,
-                                      particle['x']+size, particle['y']+size,
-                                      fill=particle['color'], outline="")
-        
-        # Draw text animations
-        for text_anim in self.text_animations:
-            if text_anim['life'] > 0:
-                alpha = text_anim['life'] / 30.0
-                size = int(text_anim['size'] * alpha)
-                self.canvas.create_text(text_anim['x'], text_anim['y'],
-                                      text=text_anim['text'], 
-                                      font=("Arial", size, "bold"),
-                                      fill=text_anim['color'])
-        
-        # Update score labels with animation
-        self.score_label.config(text=f"Score: {self.score}")
-        self.high_score_label.config(text=f"High Score: {self.high_score}")
+        # Update particles and text animations
+        self.particles.update()
+        self.texts.update()
+    
+    def tick_interval(self):
+        """Seconds per game tick, scaled by the running effects (speed boost halves it)"""
+        if self.remote:
+            return 1 / self.fps  # poll the server; it sets the pace
+        current_speed = self.speed
+        scale = self.engine.tick_scale
+        if scale != 1:
+            current_speed = max(50, int(self.speed * scale))  # Much faster!
+        return current_speed / 1000
+    
+    def render_frame(self):
+        # Interpolate between ticks only while the snake is actually moving
+        alpha = 1.0
+        if not (self.paused or self.game_over or self.remote or self.rewinding):
+            alpha = self.scheduler.alpha(self.tick_channel)
+        self.update_display(alpha)
+        if self.profiler.enabled:
+            self.update_profiler()
+    
+    def update_display(self, alpha=1.0):
+        self.renderer.render(self, alpha)
+        
+        # Update score labels only when their text changes
+        score_text = f"Score: {self.score}"
+        if self.score_label.cget('text') != score_text:
+            self.score_label.config(text=score_text)
+        high_score_text = f"High Score: {self.high_score}"
+        if self.high_score_label.cget('text') != high_score_text:
+            self.high_score_label.config(text=high_score_text)
         
         # Update status
-        self.update_status()
+        if not self.game_over and not self.paused:
+            self.update_status()
     
-    def end_game(self):
-        self.game_over = True
-        
+    def end_game(self, cause=None):
         # Add explosion effect at crash site
         head_x, head_y = self.snake[0]
         screen_x = head_x * self.cell_size + self.cell_size // 2
         screen_y = head_y * self.cell_size + self.cell_size // 2
         self.add_particle_effect(screen_x, screen_y, "#ff0000", 20)
         
-        # Game over text
-        self.canvas.create_text(self.board_width//2, self.board_height//2,
-                               text="💀 GAME OVER! 💀", 
-                               font=("Arial", 36, "bold"),
-                               fill="#ff4444")
-        self.canvas.create_text(self.board_width//2, self.board_height//2 + 50,
-                               text=f"Final Score: {self.score}", 
-                               font=("Arial", 20),
-                               fill="#ffffff")
-        self.canvas.create_text(self.board_width//2, self.board_height//2 + 80,
-                               text="Press 'R' or click 'New Game' to restart", 
-                               font=("Arial", 14),
-                               fill="#00ccff")
-        
-        self.status_label.config(text="💀 Game Over! Press R to restart")
+        # Only games a person played count towards the high scores
+        rank = None
+        if self.scores and not (self.replay or self.demo or self.autopilot or self.rewound):
+            rank = self.scores.record(self.score, len(self.snake), self.power_ups_taken,
+                                      self.engine.tick, time.time() - self.game_started,
+                                      cause, time.time(), self.engine.seed)
+        placed = f" #{rank} on the leaderboard!" if rank and self.score else ""
+        if self.scores and self.scores.error:
+            placed += f" ⚠️ Scores not saved: {self.scores.error.strerror or self.scores.error}."
+        
+        if self.remote and not self.remote.connected:
+            self.status_label.config(text="🔌 Disconnected from the server")
+        elif self.won:
+            self.status_label.config(text=f"🏆 You filled the board!{placed} Press R to restart")
+        else:
+            self.status_label.config(text=f"💀 Game Over!{placed} Press R to restart")
+        
+        if self.demo:
+            self._demo_restart = self.root.after(3000, self.restart_game)
     
     def restart_game(self):
-        self.snake = [(15, 15)]
-        self.direction = (1, 0)
-        self.food = self.spawn_food()
-        self.score = 0
-        self.game_over = False
+        if self._demo_restart is not None:
+            self.root.after_cancel(self._demo_restart)
+            self._demo_restart = None
+        if self.replay:
+            self.engine.reset(self.replay.seed)
+        else:
+            self.engine.reset()
+        self.start_recording()
+        self.inputs.clear()
         self.paused = False
-        self.power_up = None
-        self.invincible = 0
-        self.speed_boost = 0
-        self.particle_effects = []
-        self.text_animations = []
+        self.scheduler.reset_channel(self.tick_channel)
+        self.particles.clear()
+        self.texts.clear()
+        self.power_ups_taken = 0
+        self.game_started = time.time()
+        self.rewind.clear()
+        self.rewound = False
+        if self.autopilot:
+            self.autopilot.reset()
         
         # Add restart effect
-        center_x = self.board_width // 2
-        center_y = self.board_height // 2
+        if self.large_board:
+            # The camera follows the head, so celebrate where the snake starts
+            head_x, head_y = self.snake[0]
+            center_x = head_x * self.cell_size + self.cell_size // 2
+            center_y = head_y * self.cell_size + self.cell_size // 2
+        else:
+            center_x = self.board_width // 2
+            center_y = self.board_height // 2
         self.add_particle_effect(center_x, center_y, "#00ff88", 15)
         self.add_text_animation("NEW GAME!", center_x, center_y, "#00ff88")
         
         self.update_status()
     
-    def game_loop(self):
-        if not self.game_over:
-            self.move_snake()
-            
-            # Adjust speed based on power-ups
-            current_speed = self.speed
-            if self.speed_boost > 0:
-                current_speed = max(50, self.speed // 2)  # Much faster!
-            
-            self.root.after(current_speed, self.game_loop)
-        else:
-            self.root.after(1000, self.game_loop)  # Keep checking for restart
-        
-        # Always update display
-        self.update_display()
-    
     def run(self):
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            if self.scores:
+                self.scores.close()  # write out the games still queued
 
 if __name__ == "__main__":
-    game = AwesomeSnake()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Awesome Snake Game")
+    parser.add_argument('--record', metavar='DIR',
+                        help="save every game as a replay file in DIR")
+    parser.add_argument('--replay', metavar='FILE',
+                        help="watch a recorded game at normal speed")
+    parser.add_argument('--cols', type=int, default=30, help="board width in cells")
+    parser.add_argument('--rows', type=int, default=30, help="board height in cells")
+    parser.add_argument('--profile', action='store_true',
+                        help="start with the profiler overlay on (toggle with F3, save a trace with F4)")
+    parser.add_argument('--demo', action='store_true',
+                        help="attract mode: the autopilot plays until a movement key is pressed "
+                             "(needs an even number of columns or rows)")
+    parser.add_argument('--connect', metavar='HOST:PORT',
+                        help="join a multiplayer game (see netplay.py serve)")
+    parser.add_argument('--scores', metavar='FILE',
+                        default=os.path.join(os.path.expanduser('~'), '.awesome_snake_scores.jsonl'),
+                        help="where high scores and game stats are kept ('' to not keep them)")
+    parser.add_argument('--startup-time', action='store_true',
+                        help="print the time from start-up to the first frame")
+    args = parser.parse_args()
+    if args.demo and hamiltonian_cycle(args.cols, args.rows) is None:
+        # Without a cycle the autopilot falls back to path finding, which dies
+        parser.error("--demo needs an even number of columns or rows")
+    
+    game = AwesomeSnake(record_dir=args.record, replay=args.replay,
+                        cols=args.cols, rows=args.rows, profile=args.profile, demo=args.demo,
+                        connect=args.connect, scores=args.scores)
+    if args.startup_time:
+        print(f"first frame after {game.first_frame_time * 1000:.1f} ms")
     game.run()
\ No newline at end of file
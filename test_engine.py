@@ -0,0 +1,168 @@
+"""SnakeEngine against the rules of the original single-file game.
+
+Run with `python -m pytest test_engine.py`.
+"""
+import random
+
+from engine import DIRECTIONS, SnakeEngine
+
+
+class BaselineGame:
+    """The original move_snake rules on a plain list, without the Tk parts.
+
+    Food and power-up spawns are handed in rather than drawn, since the
+    engine draws them from its own RNG in its own way.
+    """
+
+    def __init__(self, engine):
+        self.cols, self.rows = engine.cols, engine.rows
+        self.snake = list(engine.snake)
+        self.direction = engine.direction
+        self.food = engine.food
+        self.power_up = engine.power_up
+        self.power_up_timer = engine.power_up_timer
+        self.score = 0
+        self.invincible = 0
+        self.speed_boost = 0
+        self.game_over = False
+
+    def move_snake(self, spawned_food, spawned_power_up):
+        head_x, head_y = self.snake[0]
+        dx, dy = self.direction
+        new_head = (head_x + dx, head_y + dy)
+
+        if self.invincible <= 0:
+            if not (0 <= new_head[0] < self.cols and 0 <= new_head[1] < self.rows):
+                self.game_over = True
+                return
+        else:
+            new_head = (new_head[0] % self.cols, new_head[1] % self.rows)
+
+        if self.invincible <= 0 and new_head in self.snake:
+            self.game_over = True
+            return
+
+        self.snake.insert(0, new_head)
+
+        if new_head == self.food:
+            points = 10
+            if self.speed_boost > 0:
+                points *= 2
+            self.score += points
+            self.food = spawned_food
+            if spawned_power_up is not None:
+                self.power_up = spawned_power_up
+                self.power_up_timer = 100
+        else:
+            self.snake.pop()
+
+        if self.power_up and new_head == self.power_up[:2]:
+            power_type = self.power_up[2]
+            if power_type == 'invincible':
+                self.invincible = 50
+            elif power_type == 'speed':
+                self.speed_boost = 50
+            elif power_type == 'double_points':
+                self.score += 50
+            self.power_up = None
+
+        if self.power_up:
+            self.power_up_timer -= 1
+            if self.power_up_timer <= 0:
+                self.power_up = None
+
+        if self.invincible > 0:
+            self.invincible -= 1
+        if self.speed_boost > 0:
+            self.speed_boost -= 1
+
+
+def _record_spawns(engine):
+    """Wrap the engine's spawns so each tick's draws can be handed to BaselineGame"""
+    spawns = {}
+    spawn_food, spawn_power_up = engine.spawn_food, engine.spawn_power_up
+
+    def food():
+        spawns['food'] = spawn_food()
+        return spawns['food']
+
+    def power_up():
+        before = engine.power_up, engine.power_up_timer
+        spawn_power_up()
+        if (engine.power_up, engine.power_up_timer) != before:
+            spawns['power_up'] = engine.power_up
+
+    engine.spawn_food, engine.spawn_power_up = food, power_up
+    return spawns
+
+
+def _choose(engine, rng, greed):
+    """Head for the food with probability `greed`, else turn at random"""
+    if engine.food is not None and rng.random() < greed:
+        (hx, hy), (fx, fy) = engine.snake[0], engine.food
+        if fx != hx:
+            return (1 if fx > hx else -1, 0)
+        return (0, 1 if fy > hy else -1)
+    return rng.choice(DIRECTIONS)
+
+
+def _play_both(seed, ticks, cols, rows, greed):
+    rng = random.Random(seed)
+    engine = SnakeEngine(cols, rows, seed=seed)
+    spawns = _record_spawns(engine)
+    baseline = BaselineGame(engine)
+    seen = set()
+    for _ in range(ticks):
+        engine.turn(_choose(engine, rng, greed))
+        baseline.direction = engine.direction
+        spawns.clear()
+        for kind, *_ in engine.step():
+            seen.add(kind)
+        baseline.move_snake(spawns.get('food'), spawns.get('power_up'))
+
+        assert list(engine.snake) == baseline.snake
+        assert engine.game_over == baseline.game_over
+        assert engine.score == baseline.score
+        assert engine.food == baseline.food
+        assert engine.power_up == baseline.power_up
+        if engine.power_up:
+            assert engine.power_up_timer == baseline.power_up_timer
+        assert engine.invincible == baseline.invincible
+        assert engine.speed_boost == baseline.speed_boost
+
+        if engine.game_over:
+            engine.reset(rng.getrandbits(32))
+            baseline = BaselineGame(engine)
+    return seen
+
+
+def test_step_matches_baseline_rules():
+    seen = set()
+    for seed in range(4):
+        seen |= _play_both(seed, 3000, 12, 12, greed=0.8)
+        # Slower eating on a bigger board lets power-ups time out
+        seen |= _play_both(seed, 3000, 24, 24, greed=0.5)
+    assert {'food', 'power_up', 'death'} <= seen
+
+
+def test_invincible_snake_wraps_around_the_walls():
+    engine = SnakeEngine(5, 5, seed=1)
+    engine.food = engine.power_up = None
+    engine.effects.schedule('invincible', engine.tick + 20)
+    x, y = engine.snake[0]
+    for _ in range(5):
+        engine.step(DIRECTIONS[1])
+    assert engine.snake[0] == (x, y) and not engine.game_over
+
+
+def test_moving_into_the_tail_kills():
+    engine = SnakeEngine(6, 6, seed=3)
+    engine.power_up = None
+    x, y = engine.snake[0]
+    for direction in (DIRECTIONS[1], DIRECTIONS[2], DIRECTIONS[3]):
+        # Grow by putting the food in front of the head
+        engine.food = (engine.snake[0][0] + direction[0], engine.snake[0][1] + direction[1])
+        engine.step(direction)
+    engine.food = None
+    engine.step(DIRECTIONS[0])
+    assert engine.game_over and engine.snake[-1] == (x, y)
@@ -0,0 +1,95 @@
+"""RemoteArena against the server's Arena: a client's copy of the board must stay exact.
+
+The server side is played by hand here: the arena is stepped directly and
+its frames are written to loopback sockets with the server's encoders.
+Run with `python -m pytest test_netplay.py`.
+"""
+import random
+import socket
+import threading
+import time
+
+from arena import Arena
+from engine import DIRECTIONS
+from netplay import RemoteArena, encode_tick, encode_welcome
+
+
+def _connect(arena, player_id):
+    """A RemoteArena for `player_id` and the server's end of its socket"""
+    with socket.create_server(('127.0.0.1', 0)) as listener:
+        accepted = []
+
+        def welcome():
+            connection, _ = listener.accept()
+            connection.sendall(encode_welcome(arena, player_id))
+            accepted.append(connection)
+
+        thread = threading.Thread(target=welcome)
+        thread.start()
+        remote = RemoteArena(*listener.getsockname())
+        thread.join()
+    return remote, accepted[0]
+
+
+def _catch_up(remote, tick, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    remote.step()
+    while remote.tick != tick:
+        assert time.monotonic() < deadline, f"client stuck at tick {remote.tick}, server at {tick}"
+        time.sleep(0.001)
+        remote.step()
+
+
+def _choose(arena, player, rng):
+    """Mostly head for the food, which keeps snakes meeting around it"""
+    if arena.food is not None and rng.random() < 0.7:
+        (hx, hy), (fx, fy) = player.body[0], arena.food
+        if fx != hx:
+            return (1 if fx > hx else -1, 0)
+        return (0, 1 if fy > hy else -1)
+    return rng.choice(DIRECTIONS)
+
+
+def _assert_mirrors(remote, arena):
+    live = {player.id: player for player in arena.players.values() if player.body is not None}
+    assert remote.tick == arena.tick
+    assert remote.food == arena.food
+    assert remote.power_up == arena.power_up
+    assert remote.bodies == {player_id: player.body for player_id, player in live.items()}
+    assert {player_id: remote.scores[player_id] for player_id in live} == \
+        {player_id: player.score for player_id, player in live.items()}
+    assert remote._occupied == arena.board.counts
+    mine = {name: expires for (player_id, name), expires in arena.effects.expires.items()
+            if player_id == remote.player_id}
+    assert dict(remote.effects.expires) == mine
+
+
+def test_remote_arena_matches_the_server_board():
+    arena = Arena(20, 20, seed=2)
+    players = [arena.join() for _ in range(4)]
+    clients = [_connect(arena, player_id) for player_id in players]
+    rng = random.Random(0)
+    seen = set()
+    try:
+        for tick in range(1500):
+            if tick == 500:
+                # A late joiner starts from a welcome taken mid-game
+                players.append(arena.join())
+                clients.append(_connect(arena, players[-1]))
+            for player_id in players:
+                player = arena.players[player_id]
+                if player.body is not None and rng.random() < 0.5:
+                    arena.turn(player_id, _choose(arena, player, rng))
+                arena.respawn(player_id)
+            events = arena.step()
+            seen.update(event[0] for event in events)
+            frame = encode_tick(arena, events)
+            for remote, connection in clients:
+                connection.sendall(frame)
+                _catch_up(remote, arena.tick)
+                _assert_mirrors(remote, arena)
+    finally:
+        for remote, connection in clients:
+            connection.close()
+            remote._socket.close()
+    assert {'grow', 'eat', 'take', 'power_up', 'death', 'spawn'} <= seen
@@ -0,0 +1,106 @@
+"""SnakeEngine.undo and snapshot/restore: going back must land exactly where the game was.
+
+Run with `python -m pytest test_undo.py`.
+"""
+import random
+
+import pytest
+
+from autopilot import Autopilot
+from engine import DIRECTIONS, SnakeEngine
+from rewind import RewindBuffer
+
+
+def _record(engine, ticks, seed, snapshots=None):
+    """Play up to `ticks` ticks and return the moves made, snapshotting after each.
+
+    The autopilot keeps the snake alive and eating; now and then a random
+    turn gets it into trouble instead.
+    """
+    rng = random.Random(seed)
+    pilot = Autopilot(engine)
+    moves = []
+    while not engine.game_over and engine.tick < ticks:
+        moves.append(rng.choice(DIRECTIONS) if rng.random() < 0.02 else pilot.choose())
+        engine.step(moves[-1])
+        if snapshots is not None:
+            snapshots.append(engine.snapshot())
+    return moves
+
+
+def _play(engine, moves):
+    for move in moves:
+        engine.step(move)
+
+
+def _engine(seed, capacity=None, cols=12, rows=10):
+    engine = SnakeEngine(cols, rows, seed=seed)
+    if capacity:
+        engine.history = RewindBuffer(capacity=capacity)
+    return engine
+
+
+def test_undo_back_to_the_start_matches_every_snapshot():
+    for seed in range(40):
+        engine = _engine(seed, capacity=2001)
+        snapshots = [engine.snapshot()]
+        _record(engine, 2000, seed, snapshots)
+        # The snapshot after the last tick is where undo starts from
+        for expected in reversed(snapshots[:-1]):
+            assert engine.undo()
+            assert engine.snapshot() == expected
+        assert not engine.undo()
+
+
+def test_undo_while_invincible_overlapping_itself():
+    engine = _engine(2, capacity=200, cols=4, rows=4)
+    engine.effects.schedule('invincible', 150)
+    snapshots = [engine.snapshot()]
+    overlapped = False
+    rng = random.Random(2)
+    while engine.tick < 120:
+        engine.step(rng.choice(DIRECTIONS))
+        snapshots.append(engine.snapshot())
+        overlapped = overlapped or max(engine.board.counts) > 1
+    assert overlapped
+    for expected in reversed(snapshots[:-1]):
+        assert engine.undo()
+        assert engine.snapshot() == expected
+
+
+def test_playing_on_after_undo_repeats_the_game():
+    engine = _engine(7, capacity=100)
+    moves = _record(engine, 400, seed=7)
+    later = engine.snapshot()
+    for _ in range(60):
+        assert engine.undo()
+    # Same moves, same food: the RNG went back too
+    _play(engine, moves[-60:])
+    assert engine.snapshot() == later
+
+
+def test_snapshot_restore_round_trips():
+    for seed in range(40):
+        engine = _engine(seed)
+        snapshots = [engine.snapshot()]
+        moves = _record(engine, 500, seed, snapshots)
+
+        other = _engine(seed + 1000)
+        for data in snapshots[::7]:
+            other.restore(data)
+            assert other.snapshot() == data
+        # A restored game plays on exactly like the original
+        middle = len(snapshots) // 2
+        other.restore(snapshots[middle])
+        _play(other, moves[middle:])
+        assert other.snapshot() == snapshots[-1]
+
+
+def test_restore_refuses_a_damaged_snapshot_and_keeps_the_game():
+    engine = _engine(4)
+    _play(engine, [None] * 5)
+    before = engine.snapshot()
+    for damaged in (before[:-3], b'XXXX' + before[4:], before + b'\0'):
+        with pytest.raises(ValueError):
+            engine.restore(damaged)
+        assert engine.snapshot() == before